@@ -0,0 +1,269 @@
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+
+# Dashboards only go stale when one of their dependencies changes, so they can live for hours
+STUDENT_DASHBOARD_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Attendance tracker counters are adjusted in place on every toggle and
+# recounted from scratch at least this often
+ATTENDANCE_COUNTERS_TIMEOUT = 60 * 5
+
+# Longest anything is cached when each process has a cache of its own,
+# since dependency bumps made by one process never reach the others
+UNSHARED_CACHE_TIMEOUT = 60 * 10
+
+# Fraction by which cache timeouts are randomly lengthened or shortened
+CACHE_TIMEOUT_JITTER = 0.1
+
+# How long an expired value may still be served while it is being rebuilt
+STALE_GRACE_PERIOD = 60 * 5
+
+# A rebuild holding its lock longer than this is presumed dead
+REBUILD_LOCK_TIMEOUT = 30
+
+# How long a worker with nothing to serve waits for another worker's rebuild
+REBUILD_WAIT_TIMEOUT = 5
+REBUILD_POLL_INTERVAL = 0.05
+
+DEPENDENCY_VERSION_PREFIX = 'cache_dependency_version'
+
+
+def student_dependency(student_pk):
+    """
+    Dependency key covering a student row and everything hanging off it
+    (enrollments, grades and attendance records).
+    """
+    return f"student:{student_pk}"
+
+
+def student_code_dependency(student_code):
+    """
+    Dependency key for a Student.student_id value, used when a lookup by code
+    found no student yet.
+    """
+    return f"student_code:{student_code}"
+
+
+def course_dependency(course_pk):
+    """
+    Dependency key for a course row.
+    """
+    return f"course:{course_pk}"
+
+
+def attendance_date_dependency(date):
+    """
+    Dependency key for every attendance record taken on a date.
+    """
+    return f"attendance_date:{date}"
+
+
+def students_dependency():
+    """
+    Dependency key for the set of students and their student IDs.
+    """
+    return "students"
+
+
+def courses_dependency():
+    """
+    Dependency key for the set of courses and their codes.
+    """
+    return "courses"
+
+
+def enrollments_dependency():
+    """
+    Dependency key for the set of enrollments, which makes up attendance rosters.
+    """
+    return "enrollments"
+
+
+def cache_is_shared():
+    """
+    Whether every process uses the same cache. The local-memory backend, which
+    Django falls back to when CACHES is not configured, is private to each process.
+    """
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def effective_timeout(timeout):
+    """
+    Return timeout, capped at UNSHARED_CACHE_TIMEOUT unless the cache is shared.
+    """
+    return timeout if cache_is_shared() else min(timeout, UNSHARED_CACHE_TIMEOUT)
+
+
+def is_fresh_local_copy(built_at):
+    """
+    Whether data a process keeps in memory, built at time.monotonic() value
+    built_at and checked against dependency versions, may still be used.
+    """
+    return cache_is_shared() or time.monotonic() - built_at < UNSHARED_CACHE_TIMEOUT
+
+
+def _version_key(dependency):
+    return f"{DEPENDENCY_VERSION_PREFIX}:{dependency}"
+
+
+def get_dependency_versions(dependencies):
+    """
+    Return the current version token of each dependency, creating missing ones.
+
+    Version tokens are random rather than counters so that an evicted version key
+    can never come back with a value an old cache entry still matches.
+    """
+    dependencies = list(dependencies)
+    if not dependencies:
+        return {}
+
+    keys = {_version_key(dependency): dependency for dependency in dependencies}
+    found = cache.get_many(list(keys))
+
+    missing = [key for key in keys if key not in found]
+    for key in missing:
+        cache.add(key, uuid.uuid4().hex, None)
+    if missing:
+        found.update(cache.get_many(missing))
+
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump_dependencies(*dependencies):
+    """
+    Invalidate every cache entry recorded against the given dependencies once
+    the current transaction commits, or right away outside a transaction.
+
+    Bumping earlier would let a reader pair the new version with the rows the
+    transaction has not committed yet, and cache the old data under it.
+    """
+    versions = {_version_key(dependency): uuid.uuid4().hex for dependency in dependencies}
+    if versions:
+        transaction.on_commit(lambda: cache.set_many(versions, None))
+
+
+def jittered(timeout):
+    """
+    Spread a timeout by +/- CACHE_TIMEOUT_JITTER so keys written together expire apart.
+    """
+    return int(timeout * random.uniform(1 - CACHE_TIMEOUT_JITTER, 1 + CACHE_TIMEOUT_JITTER))
+
+
+def seconds_until_midnight():
+    """
+    Number of seconds until the next midnight in the current time zone.
+    """
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    midnight = timezone.make_aware(datetime.combine(tomorrow, datetime.min.time()))
+    return max(int((midnight - timezone.now()).total_seconds()), 1)
+
+
+def _is_current(entry):
+    recorded = entry['dependencies']
+    return not recorded or get_dependency_versions(recorded) == recorded
+
+
+def _entry(value, versions, timeout):
+    fresh_for = jittered(effective_timeout(timeout))
+    entry = {'value': value, 'dependencies': versions, 'fresh_until': time.time() + fresh_for}
+    return entry, fresh_for + STALE_GRACE_PERIOD
+
+
+def _build_and_store(cache_key, build, timeout, tracked):
+    result = build()
+    value, versions = result if tracked else (result, {})
+
+    entry, cache_timeout = _entry(value, versions, timeout)
+    cache.set(cache_key, entry, cache_timeout)
+    return value
+
+
+def get_or_build(cache_key, build, timeout, tracked=False):
+    """
+    Return the cached value for cache_key, building it with build() when needed.
+
+    Only one worker rebuilds a key at a time. While it does, other workers keep
+    serving the expired value, or wait for the new one if there is nothing to serve.
+
+    With tracked=True, build() must return (value, dependency_versions), the
+    versions having been read with get_dependency_versions() *before* querying
+    so that a write racing with the build still invalidates it. Entries whose
+    dependencies have changed are never served, not even as stale values.
+    """
+    entry = cache.get(cache_key)
+    if entry and not _is_current(entry):
+        entry = None
+
+    if entry and entry['fresh_until'] > time.time():
+        return entry['value']
+
+    lock_key = f"{cache_key}:lock"
+    if cache.add(lock_key, True, REBUILD_LOCK_TIMEOUT):
+        try:
+            return _build_and_store(cache_key, build, timeout, tracked)
+        finally:
+            cache.delete(lock_key)
+
+    # Another worker is rebuilding this key
+    if entry:
+        return entry['value']
+
+    deadline = time.time() + REBUILD_WAIT_TIMEOUT
+    while time.time() < deadline and cache.get(lock_key):
+        time.sleep(REBUILD_POLL_INTERVAL)
+
+    entry = cache.get(cache_key)
+    if entry and _is_current(entry):
+        return entry['value']
+
+    # The other worker failed or is too slow, build it ourselves
+    return _build_and_store(cache_key, build, timeout, tracked)
+
+
+def get_many_current(cache_keys):
+    """
+    Return {cache_key: value} for the keys that hold a fresh entry whose
+    dependencies are unchanged, using one round trip for all dependency versions.
+    """
+    entries = cache.get_many(list(cache_keys))
+    now = time.time()
+    entries = {key: entry for key, entry in entries.items() if entry['fresh_until'] > now}
+
+    recorded = {}
+    for entry in entries.values():
+        recorded.update(entry['dependencies'])
+    current = get_dependency_versions(recorded)
+
+    return {
+        key: entry['value']
+        for key, entry in entries.items()
+        if all(current.get(dependency) == version for dependency, version in entry['dependencies'].items())
+    }
+
+
+def set_many_tracked(values, timeout):
+    """
+    Store {cache_key: (value, dependency_versions)} pairs as get_or_build() would.
+    """
+    # Each entry gets its own jittered timeout, so they cannot share a set_many() call
+    for cache_key, (value, versions) in values.items():
+        entry, cache_timeout = _entry(value, versions, timeout)
+        cache.set(cache_key, entry, cache_timeout)
+
+
+def get_current_versions(cache_key):
+    """
+    Return the dependency versions the entry under cache_key was built from,
+    or None when there is no entry or it has been invalidated.
+    """
+    entry = cache.get(cache_key)
+    if entry and _is_current(entry):
+        return entry['dependencies']
+    return None
@@ -0,0 +1,215 @@
+import threading
+import time
+from datetime import date as date_type
+
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import (
+    courses_dependency,
+    enrollments_dependency,
+    get_dependency_versions,
+    is_fresh_local_copy,
+    students_dependency,
+)
+
+# How long the first scan of a burst waits for others to share its write
+CHECK_IN_BATCH_DELAY = 0.02
+
+# A batch this large is written without waiting any longer
+CHECK_IN_MAX_BATCH = 1000
+
+_directory_lock = threading.Lock()
+_directory = None
+
+
+def get_directory():
+    """
+    Return (students, courses, enrollments) for resolving scans in memory:
+    student ID -> student pk for active students, course code -> course pk and
+    the set of active (student pk, course pk) enrollments.
+
+    The maps are kept per process and reloaded when a student, course or
+    enrollment changes, or after a while if changes cannot be seen across processes.
+    """
+    global _directory
+    from .models import Course, Enrollment, Student
+
+    # Read the versions before querying so a concurrent write forces a reload
+    versions = get_dependency_versions([students_dependency(), courses_dependency(), enrollments_dependency()])
+    with _directory_lock:
+        if _directory is not None and _directory[0] == versions and is_fresh_local_copy(_directory[2]):
+            return _directory[1]
+
+    built_at = time.monotonic()
+    maps = (
+        dict(Student.objects.filter(is_active=True).values_list('student_id', 'id')),
+        dict(Course.objects.values_list('code', 'id')),
+        set(Enrollment.objects.filter(is_active=True).values_list('student_id', 'course_id')),
+    )
+    with _directory_lock:
+        _directory = (versions, maps, built_at)
+    return maps
+
+
+def resolve_scans(scans):
+    """
+    Turn scans of the form {"student_id": "S2024001", "course": "CS101",
+    "date": "2024-09-02"} into unsaved present Attendance records without
+    querying the database. The date defaults to today; scans for any other
+    day are rejected, so a check-in can never rewrite past or future attendance.
+    Returns the records and a list of per-scan errors.
+    """
+    from .models import Attendance
+
+    students, courses, enrollments = get_directory()
+    today = timezone.localdate()
+
+    records = []
+    errors = []
+    for index, scan in enumerate(scans):
+        if not isinstance(scan, dict):
+            errors.append({'index': index, 'error': 'Invalid scan'})
+            continue
+
+        student_pk = students.get(str(scan.get('student_id', '')).strip())
+        course_pk = courses.get(str(scan.get('course', '')).strip())
+        if student_pk is None:
+            errors.append({'index': index, 'error': 'Unknown student'})
+            continue
+        if course_pk is None:
+            errors.append({'index': index, 'error': 'Unknown course'})
+            continue
+        if (student_pk, course_pk) not in enrollments:
+            errors.append({'index': index, 'error': 'Student is not enrolled in this course'})
+            continue
+
+        scan_date = today
+        if scan.get('date'):
+            try:
+                scan_date = date_type.fromisoformat(str(scan['date']))
+            except ValueError:
+                errors.append({'index': index, 'error': 'Invalid date'})
+                continue
+            if scan_date != today:
+                errors.append({'index': index, 'error': 'Scans can only be recorded for today'})
+                continue
+
+        records.append(Attendance(student_id=student_pk, course_id=course_pk, date=scan_date, is_present=True))
+
+    return records, errors
+
+
+class _PendingWrite:
+    def __init__(self, records, rejected):
+        self.records = records
+        self.rejected = rejected
+        self.day = timezone.localdate()
+        self.done = threading.Event()
+        self.error = None
+
+
+class CheckInBatcher:
+    """
+    Coalesces the check-ins of concurrent requests into shared upserts.
+
+    The first request of a burst waits briefly, then writes the records of
+    every request that arrived meanwhile in one batch, together with their
+    accepted and rejected counts. Each request returns only once its own
+    records are committed, so nothing is acknowledged before it is stored.
+    """
+
+    def __init__(self, delay=CHECK_IN_BATCH_DELAY, max_batch=CHECK_IN_MAX_BATCH):
+        self.delay = delay
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_count = 0
+        self._batch_full = threading.Event()
+        self._has_leader = False
+
+    def write(self, records, rejected=0):
+        """
+        Upsert records as part of the current batch, and count them along with
+        the number of rejected scans, blocking until the batch is committed.
+        """
+        if not records and not rejected:
+            return
+
+        pending = _PendingWrite(records, rejected)
+        with self._lock:
+            self._pending.append(pending)
+            self._pending_count += len(records)
+            if self._pending_count >= self.max_batch:
+                self._batch_full.set()
+            leader = not self._has_leader
+            if leader:
+                self._has_leader = True
+
+        if leader:
+            self._batch_full.wait(self.delay)
+            with self._lock:
+                batch, self._pending, self._pending_count = self._pending, [], 0
+                self._batch_full.clear()
+                self._has_leader = False
+            self._flush(batch)
+        else:
+            pending.done.wait()
+
+        if pending.error is not None:
+            raise pending.error
+
+    def _flush(self, batch):
+        from .models import Attendance, CheckInDailyCount
+
+        counts = {}
+        for pending in batch:
+            accepted, rejected = counts.get(pending.day, (0, 0))
+            counts[pending.day] = (accepted + len(pending.records), rejected + pending.rejected)
+
+        try:
+            with transaction.atomic():
+                # Repeated scans of the same student, course and date collapse into one row
+                Attendance.bulk_upsert(
+                    [record for pending in batch for record in pending.records],
+                    update_fields=['is_present']
+                )
+
+                # One update of the day's counts for the whole batch
+                for day, (accepted, rejected) in counts.items():
+                    CheckInDailyCount.record(day, accepted=accepted, rejected=rejected)
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+
+batcher = CheckInBatcher()
+
+
+def check_in(scans):
+    """
+    Record scans as present attendance. Scans that cannot be resolved are
+    rejected; repeated scans are harmless.
+    Returns the accepted and rejected counts with the per-scan errors.
+    """
+    records, errors = resolve_scans(scans)
+    batcher.write(records, rejected=len(errors))
+
+    return {
+        'accepted': len(records),
+        'rejected': len(errors),
+        'errors': errors
+    }
+
+
+def get_check_in_counts(day=None):
+    """
+    Return the number of scans accepted and rejected on a day, today by default.
+    """
+    from .models import CheckInDailyCount
+
+    day = day or timezone.localdate()
+    return {'date': day.isoformat(), **CheckInDailyCount.get_counts(day)}
@@ -425,8 +425,9 @@ class StudentDashboardPluginPublisher(CMSPluginBase):
 
     def render(self, context, instance, placeholder):
         context = super().render(context, instance, placeholder)
-        # Get student data (in a real implementation, you would get the student ID from the session)
-        student_data = instance.get_student_data()
+        # Get student data for the signed-in student, if any
+        student = context['request'].student
+        student_data = instance.get_student_data(student.student_id if student else None)
         context['student_data'] = student_data
         return context
 
@@ -499,12 +500,8 @@ class PerformanceAnalyticsPluginPublisher(CMSPluginBase):
 
     def render(self, context, instance, placeholder):
         context = super().render(context, instance, placeholder)
-        # Get the current user from the request
-        request = context['request']
-        user = request.user
-        
-        # Get chart data
-        chart_data = instance.get_chart_data(user)
+        # Get chart data for the current user's student record
+        chart_data = instance.get_chart_data(context['request'].student)
         
         context['chart_data'] = chart_data
         context['default_time_range'] = instance.default_time_range
@@ -557,6 +554,7 @@ class StudyRecommendationPluginPublisher(CMSPluginBase):
             'fields': (
                 'title',
                 'number_of_recommendations',
+                'scoring_mode',
             )
         }),
     )
@@ -1,6 +1,7 @@
 import json
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from .models import LiveNotification
+from .models import LiveNotification, AttendanceTrackerPlugin
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -63,4 +64,56 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             'type': 'notification_update',
             'data': notification_data
+        }))
+
+class AttendanceTrackerConsumer(AsyncWebsocketConsumer):
+    """
+    Pushes attendance changes to everyone who has the same tracker open,
+    as row patches for the tracker's date.
+    """
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        # Safely access url_route
+        plugin_id = self.scope.get('url_route', {}).get('kwargs', {}).get('plugin_id')
+        group_name = await self.get_group_name(plugin_id) if plugin_id else None
+        if group_name is None:
+            await self.close()
+            return
+
+        self.room_group_name = group_name
+
+        # Join the group of this tracker and date
+        await self.channel_layer.group_add(
+            self.room_group_name,
+            self.channel_name
+        )
+
+        await self.accept()
+
+    async def disconnect(self, code):
+        # Leave room group
+        if hasattr(self, 'room_group_name'):
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
+
+    @database_sync_to_async
+    def get_group_name(self, plugin_id):
+        plugin = AttendanceTrackerPlugin.objects.filter(pk=plugin_id).first()
+        return plugin.get_group_name() if plugin else None
+
+    # Receive attendance changes from the group
+    async def attendance_patch(self, event):
+        """
+        Send changed roster rows and the tracker's counters to the WebSocket
+        """
+        await self.send(text_data=json.dumps({
+            'type': 'attendance_patch',
+            'rows': event['rows'],
+            'counters': event['counters']
         }))
\ No newline at end of file
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from cms_plugins.models import Student, StudentDailyActivity
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-day student activity rollups from grade and attendance history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of students to rebuild per transaction (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        
+        student_ids = list(Student.objects.order_by('pk').values_list('pk', flat=True))
+        row_count = 0
+        
+        # Rebuild a chunk of students at a time so each transaction stays short
+        for offset in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[offset:offset + chunk_size]
+            row_count += StudentDailyActivity.rebuild(chunk)
+            self.stdout.write(f"Processed {offset + len(chunk)} of {len(student_ids)} students")
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {row_count} daily activity rows')
+        )
@@ -0,0 +1,237 @@
+import csv
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from cms_plugins.caching import attendance_date_dependency, bump_dependencies, student_dependency
+from cms_plugins.models import Attendance, AttendanceSummary, Course, Student, StudentDailyActivity
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'present', 'p'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n', 'absent', 'a'}
+
+class Command(BaseCommand):
+    help = (
+        'Import attendance records from a CSV file with the columns student_id, course_code, date '
+        'and optionally is_present and is_excused. The file is streamed, so it may be of any size.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'csv_file',
+            help='Path to the CSV file, or - to read from standard input',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of records to write per statement (default: 5000)',
+        )
+        parser.add_argument(
+            '--on-conflict',
+            choices=['update', 'skip'],
+            default='update',
+            help='Whether existing records for the same student, course and date are '
+                 'overwritten or left alone (default: update)',
+        )
+        parser.add_argument(
+            '--date-format',
+            help='strptime() format of the date column (default: ISO 8601, YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--delimiter',
+            default=',',
+            help='Field delimiter (default: ,)',
+        )
+        parser.add_argument(
+            '--encoding',
+            default='utf-8',
+            help='File encoding (default: utf-8)',
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Write rejected rows with their line number and reason to this CSV file',
+        )
+        parser.add_argument(
+            '--skip-rollups',
+            action='store_true',
+            help='Do not rebuild the attendance summaries and daily activity of the imported '
+                 'students afterwards; run rebuild_attendance_summary and backfill_daily_activity instead',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        
+        # Everything a row refers to is resolved from these maps, never row by row
+        students = dict(Student.objects.values_list('student_id', 'id'))
+        courses = dict(Course.objects.values_list('code', 'id'))
+        self.stdout.write(f"Loaded {len(students)} students and {len(courses)} courses")
+        
+        if options['csv_file'] == '-':
+            csv_file = sys.stdin
+        else:
+            try:
+                csv_file = open(options['csv_file'], newline='', encoding=options['encoding'])
+            except OSError as e:
+                raise CommandError(f"Cannot open {options['csv_file']}: {e}")
+        
+        rejects_file = rejects_writer = None
+        
+        # Only what the rollups need afterwards is kept; its size is bounded by
+        # the number of enrollments and school days, not by the file
+        touched_pairs = set()
+        touched_dates = set()
+        rejects = Counter()
+        row_count = written_count = 0
+        started = time.monotonic()
+        
+        try:
+            reader = csv.DictReader(csv_file, delimiter=options['delimiter'])
+            missing = {'student_id', 'course_code', 'date'} - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+            
+            if options['rejects']:
+                rejects_file = open(options['rejects'], 'w', newline='', encoding='utf-8')
+                rejects_writer = csv.writer(rejects_file)
+                rejects_writer.writerow(['line', 'reason', *reader.fieldnames])
+            
+            # Records keyed on (student, course, date) so the last row for a key wins within a batch
+            batch = {}
+            for row in reader:
+                row_count += 1
+                record, reason = self.parse_row(row, students, courses, options['date_format'])
+                if record is None:
+                    rejects[reason] += 1
+                    if rejects_writer:
+                        rejects_writer.writerow([reader.line_num, reason, *(row.get(field) for field in reader.fieldnames)])
+                    continue
+                
+                batch[(record.student_id, record.course_id, record.date)] = record
+                touched_pairs.add((record.student_id, record.course_id))
+                touched_dates.add(record.date)
+                
+                if len(batch) >= batch_size:
+                    written_count += self.write_batch(batch.values(), options['on_conflict'])
+                    batch = {}
+                    self.report_progress(row_count, written_count, rejects, started)
+            
+            if batch:
+                written_count += self.write_batch(batch.values(), options['on_conflict'])
+        finally:
+            if csv_file is not sys.stdin:
+                csv_file.close()
+            if rejects_file:
+                rejects_file.close()
+        
+        self.report_progress(row_count, written_count, rejects, started)
+        
+        if touched_pairs and not options['skip_rollups']:
+            self.rebuild_rollups(touched_pairs)
+        
+        # Drop cached dashboards and rosters built from the old records
+        bump_dependencies(
+            *{student_dependency(student_id) for student_id, _ in touched_pairs},
+            *{attendance_date_dependency(day) for day in touched_dates}
+        )
+        
+        for reason, count in sorted(rejects.items()):
+            self.stdout.write(self.style.WARNING(f"Rejected {count} rows: {reason}"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully imported {row_count - sum(rejects.values())} of {row_count} rows '
+                f'as {written_count} records in {time.monotonic() - started:.1f}s'
+            )
+        )
+
+    def parse_row(self, row, students, courses, date_format):
+        """
+        Build an unsaved Attendance record from a CSV row.
+        Returns (record, None), or (None, reason) for a row that has to be rejected.
+        """
+        if None in row:
+            return None, 'too many fields'
+        
+        student_id = students.get((row['student_id'] or '').strip())
+        if student_id is None:
+            return None, 'unknown student'
+        course_id = courses.get((row['course_code'] or '').strip())
+        if course_id is None:
+            return None, 'unknown course'
+        
+        try:
+            value = (row['date'] or '').strip()
+            if date_format:
+                record_date = datetime.strptime(value, date_format).date()
+            else:
+                record_date = date.fromisoformat(value)
+        except ValueError:
+            return None, 'invalid date'
+        
+        is_present = self.parse_flag(row.get('is_present'), default=True)
+        is_excused = self.parse_flag(row.get('is_excused'), default=False)
+        if is_present is None or is_excused is None:
+            return None, 'invalid flag'
+        
+        return Attendance(
+            student_id=student_id,
+            course_id=course_id,
+            date=record_date,
+            is_present=is_present,
+            is_excused=is_excused
+        ), None
+
+    def parse_flag(self, value, default):
+        value = (value or '').strip().lower()
+        if not value:
+            return default
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+        return None
+
+    def write_batch(self, records, on_conflict):
+        """
+        Write a batch with a single statement and return the number of records in it.
+        Model signals are not sent, so the rollups are rebuilt once at the end instead of per record.
+        """
+        records = list(records)
+        if on_conflict == 'update':
+            Attendance.objects.bulk_create(
+                records,
+                update_conflicts=True,
+                unique_fields=['student', 'course', 'date'],
+                update_fields=['is_present', 'is_excused']
+            )
+        else:
+            Attendance.objects.bulk_create(records, ignore_conflicts=True)
+        return len(records)
+
+    def report_progress(self, row_count, written_count, rejects, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"Read {row_count} rows, rejected {sum(rejects.values())}, wrote {written_count} records "
+            f"({row_count / elapsed:.0f} rows/s)"
+        )
+
+    def rebuild_rollups(self, pairs, chunk_size=500):
+        """
+        Rebuild the attendance summaries and daily activity of the imported students,
+        a chunk of students per transaction.
+        """
+        pairs_by_student = {}
+        for student_id, course_id in pairs:
+            pairs_by_student.setdefault(student_id, set()).add((student_id, course_id))
+        
+        student_ids = sorted(pairs_by_student)
+        for offset in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[offset:offset + chunk_size]
+            with transaction.atomic():
+                AttendanceSummary.rebuild(set().union(*(pairs_by_student[student_id] for student_id in chunk)))
+                StudentDailyActivity.rebuild(chunk)
+            self.stdout.write(f"Rebuilt rollups for {offset + len(chunk)} of {len(student_ids)} students")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from cms_plugins.models import Student
+
+class Command(BaseCommand):
+    help = (
+        'Link students without an account to the user account with the same email address, '
+        'where exactly one student and one user share it'
+    )
+
+    def handle(self, *args, **options):
+        linked_count = Student.link_user_accounts()
+        unlinked_count = Student.objects.filter(user__isnull=True).count()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully linked {linked_count} students, {unlinked_count} remain without an account')
+        )
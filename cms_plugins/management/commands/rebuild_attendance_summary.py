@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from cms_plugins.models import AttendanceSummary, Attendance
+
+class Command(BaseCommand):
+    help = 'Rebuild the attendance summary counters from the raw attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            help='Only rebuild summaries for the course with this code',
+        )
+
+    def handle(self, *args, **options):
+        course_code = options['course']
+        
+        if course_code:
+            # Rebuild only the (student, course) pairs that have records in this course
+            pairs = Attendance.objects.filter(
+                course__code=course_code
+            ).values_list('student_id', 'course_id').distinct().order_by()
+            row_count = AttendanceSummary.rebuild(pairs)
+        else:
+            row_count = AttendanceSummary.rebuild()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {row_count} attendance summary rows')
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from cms_plugins.search import get_search_backend
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text index used by course search, e.g. after loading courses in bulk'
+
+    def handle(self, *args, **options):
+        course_count = get_search_backend().rebuild()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully indexed {course_count} courses')
+        )
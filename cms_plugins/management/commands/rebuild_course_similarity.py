@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from cms_plugins.models import CourseCoEnrollment
+
+class Command(BaseCommand):
+    help = 'Recount the course co-enrollment matrix used for "often taken together" recommendations'
+
+    def handle(self, *args, **options):
+        row_count = CourseCoEnrollment.rebuild()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {row_count} co-enrollment rows')
+        )
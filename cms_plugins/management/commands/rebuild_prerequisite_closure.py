@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from cms_plugins.models import CoursePrerequisiteClosure
+
+class Command(BaseCommand):
+    help = 'Recompute the transitive closure of course prerequisites, e.g. after loading courses in bulk'
+
+    def handle(self, *args, **options):
+        row_count = CoursePrerequisiteClosure.rebuild()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {row_count} prerequisite closure rows')
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from cms_plugins.models import PendingRecommendationRefresh, Student, StudentRecommendation
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed course recommendations of every student, of the given students, or of the queued ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'student_ids',
+            nargs='*',
+            help='Student IDs to refresh (default: all students)',
+        )
+        parser.add_argument(
+            '--stale',
+            action='store_true',
+            help='Only refresh the students queued for a refresh, oldest request first; run this periodically',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of students to refresh per transaction (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        
+        if options['stale']:
+            student_ids = list(PendingRecommendationRefresh.objects.values_list('student_id', flat=True))
+        else:
+            students = Student.objects.order_by('pk')
+            if options['student_ids']:
+                students = students.filter(student_id__in=options['student_ids'])
+            student_ids = list(students.values_list('pk', flat=True))
+        row_count = 0
+        
+        # Refresh a chunk of students at a time so each transaction stays short
+        for offset in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[offset:offset + chunk_size]
+            row_count += StudentRecommendation.refresh(chunk)
+            self.stdout.write(f"Processed {offset + len(chunk)} of {len(student_ids)} students")
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully refreshed {row_count} recommendations')
+        )
@@ -0,0 +1,18 @@
+from django.utils.functional import SimpleLazyObject
+
+from .utils import get_student
+
+
+class StudentMiddleware:
+    """
+    Adds a lazily resolved ``request.student`` for the signed-in user: their
+    Student, or None. The lookup runs at most once per request, and only if
+    request.student is used. Must come after AuthenticationMiddleware.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        request.student = SimpleLazyObject(lambda: get_student(request))
+        return self.get_response(request)
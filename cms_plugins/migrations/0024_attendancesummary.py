@@ -0,0 +1,105 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+
+def populate_attendance_summaries(apps, schema_editor):
+    Attendance = apps.get_model("cms_plugins", "Attendance")
+    AttendanceSummary = apps.get_model("cms_plugins", "AttendanceSummary")
+
+    counters = {
+        "present": Count("id", filter=Q(is_present=True)),
+        "absent": Count("id", filter=Q(is_present=False)),
+        "excused": Count("id", filter=Q(is_excused=True)),
+        "total": Count("id"),
+    }
+    totals = (
+        Attendance.objects.values("student_id", "course_id")
+        .annotate(**counters)
+        .order_by()
+    )
+    months = (
+        Attendance.objects.annotate(month=TruncMonth("date"))
+        .values("student_id", "course_id", "month")
+        .annotate(**counters)
+        .order_by()
+    )
+    AttendanceSummary.objects.bulk_create(
+        [AttendanceSummary(month=None, **row) for row in totals]
+        + [AttendanceSummary(**row) for row in months],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0023_studyrecommendationplugin_attendancetrackerplugin"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "month",
+                    models.DateField(
+                        blank=True,
+                        help_text="First day of the month, empty for all-time totals",
+                        null=True,
+                    ),
+                ),
+                ("present", models.IntegerField(default=0)),
+                ("absent", models.IntegerField(default=0)),
+                ("excused", models.IntegerField(default=0)),
+                ("total", models.IntegerField(default=0)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="cms_plugins.course",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="cms_plugins.student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Attendance Summary",
+                "verbose_name_plural": "Attendance Summaries",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="attendancesummary",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("month__isnull", True)),
+                fields=("student", "course"),
+                name="unique_attendance_summary_total",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="attendancesummary",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("month__isnull", False)),
+                fields=("student", "course", "month"),
+                name="unique_attendance_summary_month",
+            ),
+        ),
+        migrations.RunPython(populate_attendance_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0024_attendancesummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StudentDailyActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("grade_count", models.IntegerField(default=0)),
+                (
+                    "grade_points",
+                    models.FloatField(
+                        default=0,
+                        help_text="Sum of the grade points recorded on this day",
+                    ),
+                ),
+                ("attendance_present", models.IntegerField(default=0)),
+                ("attendance_total", models.IntegerField(default=0)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="cms_plugins.student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Student Daily Activity",
+                "verbose_name_plural": "Student Daily Activities",
+                "ordering": ["date"],
+                "unique_together": {("student", "date")},
+            },
+        ),
+    ]
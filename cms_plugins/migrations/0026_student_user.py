@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_students_to_users(apps, schema_editor):
+    """
+    Link each student to the user account with the same email address,
+    where exactly one user and one student share it.
+    """
+    Student = apps.get_model("cms_plugins", "Student")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+
+    users_by_email = {}
+    for user in User.objects.exclude(email=""):
+        users_by_email.setdefault(user.email.lower(), []).append(user)
+
+    students_by_email = {}
+    for student in Student.objects.filter(user__isnull=True):
+        students_by_email.setdefault(student.email.lower(), []).append(student)
+
+    for email, students in students_by_email.items():
+        users = users_by_email.get(email, [])
+        if len(students) == 1 and len(users) == 1:
+            students[0].user = users[0]
+            students[0].save(update_fields=["user"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0025_studentdailyactivity"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="student",
+            name="user",
+            field=models.OneToOneField(
+                blank=True,
+                help_text="User account this student signs in with",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="student",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(link_students_to_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:57
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0026_student_user"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                django.db.models.functions.text.Upper("title"),
+                name="course_upper_title_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                django.db.models.functions.text.Upper("code"),
+                name="course_upper_code_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["last_name", "first_name"], name="student_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                django.db.models.functions.text.Upper("last_name"),
+                name="student_upper_last_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                django.db.models.functions.text.Upper("first_name"),
+                name="student_upper_first_name_idx",
+            ),
+        ),
+    ]
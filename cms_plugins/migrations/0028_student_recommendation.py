@@ -0,0 +1,100 @@
+# Generated by Django 5.0.14 on 2026-10-18 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0027_roster_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StudentRecommendation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "rank",
+                    models.PositiveIntegerField(
+                        help_text="Position among the student's recommendations, from 1"
+                    ),
+                ),
+                ("score", models.FloatField()),
+                (
+                    "difficulty",
+                    models.CharField(
+                        choices=[
+                            ("Beginner", "Beginner"),
+                            ("Intermediate", "Intermediate"),
+                            ("Advanced", "Advanced"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "category",
+                    models.CharField(
+                        choices=[
+                            ("science", "Science"),
+                            ("arts", "Arts"),
+                            ("business", "Business"),
+                            ("technology", "Technology"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "catalog_version",
+                    models.CharField(
+                        help_text="State of the course catalog the row was scored against",
+                        max_length=64,
+                    ),
+                ),
+                ("computed_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="cms_plugins.course",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recommendations",
+                        to="cms_plugins.student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Student Recommendation",
+                "verbose_name_plural": "Student Recommendations",
+                "ordering": ["student_id", "rank"],
+                "indexes": [
+                    models.Index(
+                        fields=["student", "rank"], name="student_reco_rank_idx"
+                    ),
+                    models.Index(
+                        fields=["student", "difficulty", "rank"],
+                        name="student_reco_difficulty_idx",
+                    ),
+                    models.Index(
+                        fields=["student", "category", "rank"],
+                        name="student_reco_category_idx",
+                    ),
+                ],
+                "unique_together": {("student", "course")},
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.14 on 2026-10-18 04:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0028_student_recommendation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studyrecommendationplugin",
+            name="scoring_mode",
+            field=models.CharField(
+                choices=[
+                    ("profile", "Grades and interests"),
+                    ("similar", "Courses often taken together"),
+                ],
+                default="profile",
+                help_text="How courses are picked for a signed-in student",
+                max_length=20,
+            ),
+        ),
+        migrations.CreateModel(
+            name="CourseCoEnrollment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="co_enrollments",
+                        to="cms_plugins.course",
+                    ),
+                ),
+                (
+                    "other_course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="cms_plugins.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Course Co-enrollment",
+                "verbose_name_plural": "Course Co-enrollments",
+                "unique_together": {("course", "other_course")},
+            },
+        ),
+    ]
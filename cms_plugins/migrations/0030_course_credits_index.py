@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-18 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0029_course_co_enrollment"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["credits"], name="course_credits_idx"),
+        ),
+    ]
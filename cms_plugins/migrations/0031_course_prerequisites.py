@@ -0,0 +1,65 @@
+# Generated by Django 5.0.14 on 2026-10-18 04:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0030_course_credits_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="prerequisites",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="Courses that must be passed before taking this one",
+                related_name="required_for",
+                to="cms_plugins.course",
+            ),
+        ),
+        migrations.CreateModel(
+            name="CoursePrerequisiteClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "depth",
+                    models.PositiveIntegerField(
+                        help_text="Length of the shortest prerequisite chain, 1 for a direct prerequisite"
+                    ),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prerequisite_closure",
+                        to="cms_plugins.course",
+                    ),
+                ),
+                (
+                    "prerequisite",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="cms_plugins.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Course Prerequisite Closure",
+                "verbose_name_plural": "Course Prerequisite Closures",
+                "unique_together": {("course", "prerequisite")},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-18 05:12
+
+from django.db import migrations
+
+
+def create_course_search_index(apps, schema_editor):
+    """
+    Create the FTS5 table backing course search on SQLite and fill it with
+    the existing courses. Other databases search without it.
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE cms_plugins_course_fts USING fts5("
+        "title, code, instructor, description, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+    )
+    schema_editor.execute(
+        "INSERT INTO cms_plugins_course_fts (rowid, title, code, instructor, description) "
+        "SELECT id, title, code, instructor, description FROM cms_plugins_course"
+    )
+
+
+def drop_course_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS cms_plugins_course_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0031_course_prerequisites"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_course_search_index, drop_course_search_index),
+    ]
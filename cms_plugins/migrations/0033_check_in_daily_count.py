@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-18 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0032_course_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CheckInDailyCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("accepted", models.IntegerField(default=0)),
+                ("rejected", models.IntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Check-in Daily Count",
+                "verbose_name_plural": "Check-in Daily Counts",
+                "ordering": ["-date"],
+            },
+        ),
+    ]
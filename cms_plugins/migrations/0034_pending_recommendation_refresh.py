@@ -0,0 +1,47 @@
+# Generated by Django 5.0.14 on 2026-10-18 06:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms_plugins", "0033_check_in_daily_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingRecommendationRefresh",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "requested_at",
+                    models.DateTimeField(
+                        help_text="Latest time a refresh was requested"
+                    ),
+                ),
+                (
+                    "student",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_recommendation_refresh",
+                        to="cms_plugins.student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Pending Recommendation Refresh",
+                "verbose_name_plural": "Pending Recommendation Refreshes",
+                "ordering": ["requested_at"],
+            },
+        ),
+    ]
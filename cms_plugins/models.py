@@ -1,6 +1,8 @@
+import logging
 from typing import TYPE_CHECKING
-from django.db import models
-from django.db.models import Q
+from django.db import models, IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.db.models.functions import Upper
 from cms.models.pluginmodel import CMSPlugin
 
 # Use TYPE_CHECKING to avoid circular imports at runtime
@@ -8,6 +10,8 @@ if TYPE_CHECKING:
     from cms_plugins.models import Announcement, QuickLinkItem, StatisticsCounterItem
     from django.db.models.manager import Manager
 
+logger = logging.getLogger(__name__)
+
 class Announcement(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
@@ -66,6 +70,18 @@ class Course(models.Model):
         ('technology', 'Technology'),
     ]
     
+    DIFFICULTY_CHOICES = [
+        ('Beginner', 'Beginner'),
+        ('Intermediate', 'Intermediate'),
+        ('Advanced', 'Advanced'),
+    ]
+    # Credits a course needs for each difficulty level, hardest first
+    DIFFICULTY_MIN_CREDITS = [
+        ('Advanced', 4),
+        ('Intermediate', 3),
+        ('Beginner', 0),
+    ]
+    
     title = models.CharField(max_length=200)
     code = models.CharField(max_length=20, unique=True)
     description = models.TextField()
@@ -74,6 +90,13 @@ class Course(models.Model):
     credits: int = models.PositiveIntegerField(default=3)  # type: ignore
     duration = models.CharField(max_length=50, help_text="e.g., '15 weeks', '8 weeks'")
     is_published: bool = models.BooleanField(default=True)  # type: ignore
+    prerequisites = models.ManyToManyField(
+        'self',
+        symmetrical=False,
+        blank=True,
+        related_name='required_for',
+        help_text="Courses that must be passed before taking this one"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -85,9 +108,45 @@ class Course(models.Model):
         ordering = ['title']
         verbose_name = "Course"
         verbose_name_plural = "Courses"
+        indexes = [
+            # Case-insensitive prefix search
+            models.Index(Upper('title'), name='course_upper_title_idx'),
+            models.Index(Upper('code'), name='course_upper_code_idx'),
+            # Difficulty levels are credit ranges
+            models.Index(fields=['credits'], name='course_credits_idx'),
+        ]
     
     def __str__(self) -> str:
         return f"{self.code} - {self.title}"
+    
+    @property
+    def difficulty_level(self) -> str:
+        return self.get_difficulty(self.credits)
+    
+    @classmethod
+    def get_difficulty(cls, credits) -> str:
+        """
+        Difficulty level of a course with the given number of credits.
+        """
+        for level, min_credits in cls.DIFFICULTY_MIN_CREDITS:
+            if credits >= min_credits:
+                return level
+        return cls.DIFFICULTY_MIN_CREDITS[-1][0]
+    
+    @classmethod
+    def difficulty_q(cls, difficulty, credits_field='credits') -> Q:
+        """
+        Q object matching the courses of a difficulty level, compared
+        case-insensitively, as a range of credits_field.
+        """
+        for index, (level, min_credits) in enumerate(cls.DIFFICULTY_MIN_CREDITS):
+            if level.lower() == difficulty.lower():
+                q = Q(**{f'{credits_field}__gte': min_credits})
+                if index > 0:
+                    q &= Q(**{f'{credits_field}__lt': cls.DIFFICULTY_MIN_CREDITS[index - 1][1]})
+                return q
+        # No course has an unknown level
+        return Q(pk__in=[])
 
 # Add the Student and Grade models
 class Student(models.Model):
@@ -101,6 +160,14 @@ class Student(models.Model):
     date_of_birth = models.DateField()
     enrollment_date = models.DateField()
     is_active: bool = models.BooleanField(default=True)  # type: ignore
+    user = models.OneToOneField(
+        'auth.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='student',
+        help_text="User account this student signs in with"
+    )
     
     # Type annotation for the objects manager to help type checkers
     if TYPE_CHECKING:
@@ -110,6 +177,13 @@ class Student(models.Model):
         ordering = ['last_name', 'first_name']
         verbose_name = "Student"
         verbose_name_plural = "Students"
+        indexes = [
+            # Roster pages are ordered by name
+            models.Index(fields=['last_name', 'first_name'], name='student_name_idx'),
+            # Case-insensitive prefix search
+            models.Index(Upper('last_name'), name='student_upper_last_name_idx'),
+            models.Index(Upper('first_name'), name='student_upper_first_name_idx'),
+        ]
     
     def __str__(self) -> str:
         return f"{self.first_name} {self.last_name} ({self.student_id})"
@@ -117,6 +191,45 @@ class Student(models.Model):
     @property
     def full_name(self) -> str:
         return f"{self.first_name} {self.last_name}"
+    
+    @classmethod
+    def link_user_accounts(cls, emails=None) -> int:
+        """
+        Link students without an account to the user account with the same
+        email address, where exactly one unlinked student and one user without
+        a student share it. Only the given email addresses are considered, if any.
+        Returns the number of students linked.
+        """
+        from django.contrib.auth import get_user_model
+        
+        User = get_user_model()
+        users = User.objects.exclude(email='').filter(student__isnull=True)
+        students = cls.objects.exclude(email='').filter(user__isnull=True)
+        if emails is not None:
+            emails = [email for email in emails if email]
+            if not emails:
+                return 0
+            email_filter = Q()
+            for email in emails:
+                email_filter |= Q(email__iexact=email)
+            users = users.filter(email_filter)
+            students = students.filter(email_filter)
+        
+        users_by_email = {}
+        for user_id, email in users.values_list('pk', 'email'):
+            users_by_email.setdefault(email.lower(), []).append(user_id)
+        
+        students_by_email = {}
+        for student_id, email in students.values_list('pk', 'email'):
+            students_by_email.setdefault(email.lower(), []).append(student_id)
+        
+        linked = 0
+        for email, student_ids in students_by_email.items():
+            user_ids = users_by_email.get(email, [])
+            if len(student_ids) == 1 and len(user_ids) == 1:
+                # update() so linking from a post_save receiver does not send post_save again
+                linked += cls.objects.filter(pk=student_ids[0], user__isnull=True).update(user_id=user_ids[0])
+        return linked
 
 class Grade(models.Model):
     """
@@ -129,6 +242,15 @@ class Grade(models.Model):
         ('D+', 'D+'), ('D', 'D'), ('D-', 'D-'),
         ('F', 'F'),
     ]
+    GRADE_POINTS = {
+        'A+': 4.0, 'A': 4.0, 'A-': 3.7,
+        'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+        'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+        'D+': 1.3, 'D': 1.0, 'D-': 0.7,
+        'F': 0.0
+    }
+    # Grades that count as having completed a course
+    PASSING_GRADES = [grade for grade, points in GRADE_POINTS.items() if points > 0]
     
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -196,6 +318,751 @@ class Attendance(models.Model):
         if self.is_excused:
             status += " (Excused)"
         return f"{self.student} - {self.course} - {self.date} - {status}"
+    
+    @classmethod
+    def bulk_upsert(cls, records, batch_size=500, update_fields=('is_present', 'is_excused')) -> int:
+        """
+        Insert or update many unsaved Attendance instances, keyed on (student, course, date),
+        with one INSERT ... ON CONFLICT DO UPDATE statement per batch. Rows that
+        already exist only have update_fields overwritten.
+        bulk_create() skips model signals, so the changes are applied to the
+        summary counters and daily rollups, and the dashboard caches are
+        invalidated, here instead.
+        Returns the number of distinct records written.
+        """
+        from .caching import attendance_date_dependency, bump_dependencies, student_dependency
+        
+        # A statement may not update the same row twice, so the last entry per key wins
+        records = list({
+            (record.student_id, record.course_id, record.date): record
+            for record in records
+        }.values())
+        if not records:
+            return 0
+        
+        # Lock and write rows in one fixed key order so concurrent batches cannot deadlock
+        key_fields = ('course_id', 'date', 'student_id')
+        records.sort(key=lambda record: (record.course_id, record.date, record.student_id))
+        keys = [(record.course_id, record.date, record.student_id) for record in records]
+        
+        fields = ['student_id', 'course_id', 'date', 'is_present', 'is_excused']
+        with transaction.atomic():
+            # Lock the rows being overwritten and keep their state to work out what changed
+            previous = {}
+            for offset in range(0, len(keys), COUNTER_KEYS_PER_QUERY):
+                for row in cls.objects.select_for_update().filter(
+                    _exact_keys_filter(key_fields, keys[offset:offset + COUNTER_KEYS_PER_QUERY])
+                ).order_by(*key_fields).values(*fields):
+                    previous[(row['course_id'], row['date'], row['student_id'])] = row
+            
+            cls.objects.bulk_create(
+                records,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['student', 'course', 'date'],
+                update_fields=list(update_fields)
+            )
+            
+            # Take each changed record out of the rollups in its old state and add it back in its new one
+            changes = []
+            for key, record in zip(keys, records):
+                old = previous.get(key)
+                new = {field: getattr(record, field) for field in fields}
+                if old:
+                    # Existing rows keep the fields that were not updated
+                    new.update({field: old[field] for field in ('is_present', 'is_excused') if field not in update_fields})
+                if old == new:
+                    continue
+                
+                if old:
+                    changes.append((old, -1))
+                changes.append((new, 1))
+            
+            AttendanceSummary.record_many(changes)
+            StudentDailyActivity.record_attendance_many(changes)
+        
+        bump_dependencies(
+            *{student_dependency(record.student_id) for record in records},
+            *{attendance_date_dependency(record.date) for record in records}
+        )
+        transaction.on_commit(lambda: AttendanceTrackerPlugin.broadcast_attendance(records))
+        return len(records)
+
+def _add_to_counters(model, lookup, deltas) -> None:
+    """
+    Add deltas to the counter fields of the row matching lookup using F()
+    expressions, so concurrent writers never lose an update. The row is
+    created on first use; deltas are never applied to a missing row if any is negative.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates or model.objects.filter(**lookup).update(**updates):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another writer created the row first, so add to theirs
+        model.objects.filter(**lookup).update(**updates)
+
+# Upper bound on the keys matched by one row-locking or counter query
+COUNTER_KEYS_PER_QUERY = 300
+
+def _exact_keys_filter(key_fields, keys) -> Q:
+    """
+    Match exactly the rows whose key_fields values are one of keys. Keys that
+    differ only in their last value share a single IN clause.
+    """
+    grouped = {}
+    for key in keys:
+        grouped.setdefault(tuple(key[:-1]), []).append(key[-1])
+    match = Q()
+    for prefix, values in grouped.items():
+        match |= Q(**dict(zip(key_fields[:-1], prefix)), **{f'{key_fields[-1]}__in': values})
+    return match
+
+def _sum_deltas(totals, key, deltas) -> None:
+    row = totals.setdefault(key, dict.fromkeys(deltas, 0))
+    for field, delta in deltas.items():
+        row[field] += delta
+
+def _bulk_add_to_counters(model, key_fields, deltas, **fixed) -> None:
+    """
+    Set-based _add_to_counters() for many rows. deltas maps the key_fields
+    values of each row to its deltas; fixed holds lookups shared by every row.
+    The rows are locked in key order, missing ones are created with zero
+    counters, and each distinct set of deltas is added with one F() UPDATE.
+    """
+    deltas = {key: row_deltas for key, row_deltas in deltas.items() if any(row_deltas.values())}
+    keys = sorted(deltas)
+
+    existing = set()
+    for offset in range(0, len(keys), COUNTER_KEYS_PER_QUERY):
+        existing.update(
+            model.objects.select_for_update().filter(
+                _exact_keys_filter(key_fields, keys[offset:offset + COUNTER_KEYS_PER_QUERY]), **fixed
+            ).order_by(*key_fields).values_list(*key_fields)
+        )
+
+    # As in _add_to_counters(), negative deltas never create a row
+    model.objects.bulk_create([
+        model(**fixed, **dict(zip(key_fields, key)))
+        for key in keys
+        if key not in existing and all(delta >= 0 for delta in deltas[key].values())
+    ], batch_size=COUNTER_KEYS_PER_QUERY, ignore_conflicts=True)
+
+    keys_by_deltas = {}
+    for key in keys:
+        keys_by_deltas.setdefault(tuple(deltas[key].items()), []).append(key)
+    for row_deltas, group in keys_by_deltas.items():
+        updates = {field: F(field) + delta for field, delta in row_deltas if delta}
+        for offset in range(0, len(group), COUNTER_KEYS_PER_QUERY):
+            model.objects.filter(
+                _exact_keys_filter(key_fields, group[offset:offset + COUNTER_KEYS_PER_QUERY]), **fixed
+            ).update(**updates)
+
+class AttendanceSummary(models.Model):
+    """
+    Running attendance counters for a student in a course.
+    Rows with an empty month hold the all-time totals, the others hold
+    per-month buckets keyed by the first day of the month.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    month = models.DateField(null=True, blank=True, help_text="First day of the month, empty for all-time totals")
+    present: int = models.IntegerField(default=0)  # type: ignore
+    absent: int = models.IntegerField(default=0)  # type: ignore
+    excused: int = models.IntegerField(default=0)  # type: ignore
+    total: int = models.IntegerField(default=0)  # type: ignore
+
+    # Type annotation for the objects manager to help type checkers
+    if TYPE_CHECKING:
+        objects: 'Manager'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'course'],
+                condition=Q(month__isnull=True),
+                name='unique_attendance_summary_total'
+            ),
+            models.UniqueConstraint(
+                fields=['student', 'course', 'month'],
+                condition=Q(month__isnull=False),
+                name='unique_attendance_summary_month'
+            ),
+        ]
+        verbose_name = "Attendance Summary"
+        verbose_name_plural = "Attendance Summaries"
+
+    def __str__(self) -> str:
+        period = self.month.strftime('%B %Y') if self.month else "All time"
+        return f"{self.student} - {self.course} - {period}: {self.present}/{self.total}"
+
+    @property
+    def percentage(self) -> float:
+        return (self.present / self.total) * 100 if self.total > 0 else 0
+
+    @classmethod
+    def record(cls, student_id, course_id, date, is_present, is_excused, sign=1) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) a single attendance record from the
+        all-time and monthly counters.
+        """
+        deltas = cls._deltas(is_present, is_excused, sign)
+        for month in (None, date.replace(day=1)):
+            _add_to_counters(cls, {'student_id': student_id, 'course_id': course_id, 'month': month}, deltas)
+
+    @classmethod
+    def record_many(cls, changes) -> None:
+        """
+        Apply many record() calls at once. changes holds (attendance, sign)
+        pairs, attendance being a dict of record()'s arguments; the deltas are
+        summed per counter row and written set-based.
+        """
+        totals = {}
+        months = {}
+        for attendance, sign in changes:
+            deltas = cls._deltas(attendance['is_present'], attendance['is_excused'], sign)
+            _sum_deltas(totals, (attendance['course_id'], attendance['student_id']), deltas)
+            _sum_deltas(months, (attendance['course_id'], attendance['date'].replace(day=1), attendance['student_id']), deltas)
+        _bulk_add_to_counters(cls, ('course_id', 'student_id'), totals, month=None)
+        _bulk_add_to_counters(cls, ('course_id', 'month', 'student_id'), months)
+
+    @staticmethod
+    def _deltas(is_present, is_excused, sign) -> dict:
+        return {
+            'present': sign if is_present else 0,
+            'absent': 0 if is_present else sign,
+            'excused': sign if is_excused else 0,
+            'total': sign,
+        }
+
+    @classmethod
+    def rebuild(cls, pairs=None) -> int:
+        """
+        Recompute counters from the raw attendance records.
+        Rebuilds every summary, or only those of the given (student_id, course_id) pairs.
+        Returns the number of summary rows written.
+        """
+        from django.db.models import Count
+        from django.db.models.functions import TruncMonth
+
+        records = Attendance.objects.all()
+        summaries = cls.objects.all()
+        if pairs is not None:
+            pairs = set(pairs)
+            if not pairs:
+                return 0
+            # Group by course so a whole class becomes a single IN clause
+            students_by_course = {}
+            for student_id, course_id in pairs:
+                students_by_course.setdefault(course_id, set()).add(student_id)
+            pair_filter = Q()
+            for course_id, student_ids in students_by_course.items():
+                pair_filter |= Q(course_id=course_id, student_id__in=student_ids)
+            records = records.filter(pair_filter)
+            summaries = summaries.filter(pair_filter)
+
+        counters = {
+            'present': Count('id', filter=Q(is_present=True)),
+            'absent': Count('id', filter=Q(is_present=False)),
+            'excused': Count('id', filter=Q(is_excused=True)),
+            'total': Count('id'),
+        }
+        rows = [
+            cls(month=None, **row)
+            for row in records.values('student_id', 'course_id').annotate(**counters).order_by()
+        ]
+        rows += [
+            cls(**row)
+            for row in records.annotate(month=TruncMonth('date')).values(
+                'student_id', 'course_id', 'month'
+            ).annotate(**counters).order_by()
+        ]
+
+        with transaction.atomic():
+            summaries.delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+class StudentDailyActivity(models.Model):
+    """
+    Per-day rollup of a student's grades and attendance, used by the analytics charts.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    date = models.DateField()
+    grade_count: int = models.IntegerField(default=0)  # type: ignore
+    grade_points = models.FloatField(default=0, help_text="Sum of the grade points recorded on this day")
+    attendance_present: int = models.IntegerField(default=0)  # type: ignore
+    attendance_total: int = models.IntegerField(default=0)  # type: ignore
+    
+    # Type annotation for the objects manager to help type checkers
+    if TYPE_CHECKING:
+        objects: 'Manager'
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['student', 'date']
+        verbose_name = "Student Daily Activity"
+        verbose_name_plural = "Student Daily Activities"
+    
+    def __str__(self) -> str:
+        return f"{self.student} - {self.date}"
+    
+    @classmethod
+    def record_grade(cls, student_id, date, grade, sign=1) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) a single grade from the student's day.
+        """
+        _add_to_counters(cls, {'student_id': student_id, 'date': date}, {
+            'grade_count': sign,
+            'grade_points': sign * Grade.GRADE_POINTS.get(grade, 0),
+        })
+    
+    @classmethod
+    def record_attendance(cls, student_id, date, is_present, sign=1) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) a single attendance record from the student's day.
+        """
+        _add_to_counters(cls, {'student_id': student_id, 'date': date}, {
+            'attendance_present': sign if is_present else 0,
+            'attendance_total': sign,
+        })
+    
+    @classmethod
+    def record_attendance_many(cls, changes) -> None:
+        """
+        Apply many record_attendance() calls at once. changes holds
+        (attendance, sign) pairs as for AttendanceSummary.record_many().
+        """
+        days = {}
+        for attendance, sign in changes:
+            _sum_deltas(days, (attendance['date'], attendance['student_id']), {
+                'attendance_present': sign if attendance['is_present'] else 0,
+                'attendance_total': sign,
+            })
+        _bulk_add_to_counters(cls, ('date', 'student_id'), days)
+    
+    @classmethod
+    def rebuild(cls, student_ids, dates=None) -> int:
+        """
+        Recompute the rollups of the given students from their grades and attendance,
+        optionally only for the given dates.
+        Returns the number of rollup rows written.
+        """
+        from django.db.models import Case, Count, FloatField, Sum, Value, When
+        
+        grades = Grade.objects.filter(student_id__in=student_ids)
+        attendance = Attendance.objects.filter(student_id__in=student_ids)
+        rollups = cls.objects.filter(student_id__in=student_ids)
+        if dates is not None:
+            grades = grades.filter(date_recorded__in=dates)
+            attendance = attendance.filter(date__in=dates)
+            rollups = rollups.filter(date__in=dates)
+        
+        rows = {}
+        grade_points = Case(
+            *[When(grade=grade, then=Value(points)) for grade, points in Grade.GRADE_POINTS.items()],
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+        for day in grades.values(
+            'student_id', 'date_recorded'
+        ).annotate(count=Count('id'), points=Sum(grade_points)).order_by():
+            row = rows.setdefault((day['student_id'], day['date_recorded']), cls(
+                student_id=day['student_id'], date=day['date_recorded']
+            ))
+            row.grade_count = day['count']
+            row.grade_points = day['points']
+        
+        for day in attendance.values(
+            'student_id', 'date'
+        ).annotate(present=Count('id', filter=Q(is_present=True)), total=Count('id')).order_by():
+            row = rows.setdefault((day['student_id'], day['date']), cls(
+                student_id=day['student_id'], date=day['date']
+            ))
+            row.attendance_present = day['present']
+            row.attendance_total = day['total']
+        
+        with transaction.atomic():
+            rollups.delete()
+            cls.objects.bulk_create(rows.values(), batch_size=1000)
+        return len(rows)
+
+class CheckInDailyCount(models.Model):
+    """
+    Number of attendance check-in scans accepted and rejected on a day,
+    shared by every process serving the check-in endpoint.
+    """
+    date = models.DateField(unique=True)
+    accepted: int = models.IntegerField(default=0)  # type: ignore
+    rejected: int = models.IntegerField(default=0)  # type: ignore
+
+    # Type annotation for the objects manager to help type checkers
+    if TYPE_CHECKING:
+        objects: 'Manager'
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = "Check-in Daily Count"
+        verbose_name_plural = "Check-in Daily Counts"
+
+    def __str__(self) -> str:
+        return f"{self.date}: {self.accepted} accepted, {self.rejected} rejected"
+
+    @classmethod
+    def record(cls, date, accepted=0, rejected=0) -> None:
+        """
+        Add the outcome of a check-in request to the day's counts.
+        """
+        _add_to_counters(cls, {'date': date}, {'accepted': accepted, 'rejected': rejected})
+
+    @classmethod
+    def get_counts(cls, date) -> dict:
+        """
+        Return the day's accepted and rejected counts, zero if nothing was scanned.
+        """
+        counts = cls.objects.filter(date=date).values('accepted', 'rejected').first()
+        return counts or {'accepted': 0, 'rejected': 0}
+
+class StudentRecommendation(models.Model):
+    """
+    Precomputed course recommendations for a student: every published course
+    with a positive score, ranked best first. Students whose grades or
+    enrollments changed, or whose rows were scored against an older catalog,
+    are queued in PendingRecommendationRefresh and scored live until the
+    refresh_recommendations command rescores them.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='recommendations')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    rank: int = models.PositiveIntegerField(help_text="Position among the student's recommendations, from 1")  # type: ignore
+    score = models.FloatField()
+    difficulty = models.CharField(max_length=20, choices=Course.DIFFICULTY_CHOICES)
+    category = models.CharField(max_length=20, choices=Course.COURSE_CATEGORIES)
+    catalog_version = models.CharField(max_length=64, help_text="State of the course catalog the row was scored against")
+    computed_at = models.DateTimeField(auto_now_add=True)
+    
+    # Type annotation for the objects manager to help type checkers
+    if TYPE_CHECKING:
+        objects: 'Manager'
+    
+    class Meta:
+        ordering = ['student_id', 'rank']
+        unique_together = ['student', 'course']
+        indexes = [
+            # Top recommendations, optionally for one difficulty level or subject
+            models.Index(fields=['student', 'rank'], name='student_reco_rank_idx'),
+            models.Index(fields=['student', 'difficulty', 'rank'], name='student_reco_difficulty_idx'),
+            models.Index(fields=['student', 'category', 'rank'], name='student_reco_category_idx'),
+        ]
+        verbose_name = "Student Recommendation"
+        verbose_name_plural = "Student Recommendations"
+    
+    def __str__(self) -> str:
+        return f"{self.student} - #{self.rank} {self.course}"
+    
+    @classmethod
+    def get_catalog_version(cls) -> str:
+        """
+        Identify the current state of the course catalog. Any course being
+        added, edited or deleted changes it.
+        """
+        from django.db.models import Count, Max
+        
+        catalog = Course.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+        updated = catalog['updated'].isoformat() if catalog['updated'] else ''
+        return f"{catalog['count']}:{updated}"
+    
+    @classmethod
+    def refresh(cls, student_ids) -> int:
+        """
+        Rescore the whole published catalog for the given students, replace
+        their rows and take them off the refresh queue.
+        Returns the number of rows written.
+        """
+        from django.utils import timezone
+        from .recommendations import recommend_courses
+        from .utils import StudentProfile
+        
+        student_ids = sorted(set(student_ids))
+        if not student_ids:
+            return 0
+        
+        with transaction.atomic():
+            # Lock the students so concurrent refreshes of the same student run one after the other
+            students = list(Student.objects.select_for_update().filter(pk__in=student_ids).order_by('pk'))
+            
+            # Requests queued after this point may not be reflected in the new rows, so they are kept
+            started_at = timezone.now()
+            
+            # Read the catalog version before scoring so a course edited meanwhile leaves the rows stale
+            catalog_version = cls.get_catalog_version()
+            profiles = StudentProfile.load_many([student.pk for student in students])
+            
+            rows = []
+            for student in students:
+                ranked = recommend_courses(student, profiles[student.pk], limit=None)
+                rows += [
+                    cls(
+                        student=student,
+                        course=course,
+                        rank=rank,
+                        score=score,
+                        difficulty=course.difficulty_level,
+                        category=course.category,
+                        catalog_version=catalog_version
+                    )
+                    for rank, (course, score) in enumerate(ranked, start=1)
+                ]
+            
+            cls.objects.filter(student_id__in=student_ids).delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+            PendingRecommendationRefresh.objects.filter(
+                student_id__in=student_ids,
+                requested_at__lte=started_at
+            ).delete()
+        return len(rows)
+    
+    @classmethod
+    def get_for_student(cls, student, difficulty_filter='', subject_filter='', limit=5):
+        """
+        Return the student's best recommendations, optionally only those of one
+        difficulty level or subject category. If the rows are queued for a
+        refresh, missing or scored against an older catalog, the student is
+        queued and scored live instead; the rows are never rebuilt here.
+        """
+        if PendingRecommendationRefresh.objects.filter(student=student).exists():
+            return cls._score_live(student, difficulty_filter, subject_filter, limit)
+        
+        catalog_version = cls.get_catalog_version()
+        
+        # Courses the student lacks a prerequisite for are skipped, keeping their rank
+        rows = cls.objects.filter(student=student).filter(
+            ~CoursePrerequisiteClosure.missing_for(student, 'course_id')
+        ).select_related('course')
+        if difficulty_filter:
+            rows = rows.filter(difficulty=difficulty_filter.capitalize())
+        if subject_filter:
+            rows = rows.filter(category=subject_filter)
+        
+        recommendations = list(rows[:limit])
+        if recommendations:
+            # A student's rows are always replaced together, so one row tells for all of them
+            current = recommendations[0].catalog_version == catalog_version
+        else:
+            current = cls.objects.filter(student=student, catalog_version=catalog_version).exists()
+        
+        if not current:
+            PendingRecommendationRefresh.request([student.pk])
+            return cls._score_live(student, difficulty_filter, subject_filter, limit)
+        return recommendations
+    
+    @classmethod
+    def _score_live(cls, student, difficulty_filter, subject_filter, limit):
+        """
+        Score the catalog for one student without storing the result, as unsaved
+        rows ranked and filtered the same way as stored ones.
+        """
+        from .recommendations import recommend_courses
+        from .utils import StudentProfile
+        
+        missing_prerequisites = set(
+            Course.objects.filter(CoursePrerequisiteClosure.missing_for(student)).values_list('pk', flat=True)
+        )
+        ranked = recommend_courses(
+            student,
+            StudentProfile.load(student),
+            difficulty_filter=difficulty_filter,
+            subject_filter=subject_filter,
+            limit=None
+        )
+        return [
+            cls(
+                student=student,
+                course=course,
+                rank=rank,
+                score=score,
+                difficulty=course.difficulty_level,
+                category=course.category
+            )
+            for rank, (course, score) in enumerate(ranked, start=1)
+            if course.pk not in missing_prerequisites
+        ][:limit]
+
+class PendingRecommendationRefresh(models.Model):
+    """
+    A student whose StudentRecommendation rows are out of date, waiting for
+    the refresh_recommendations command to rescore them.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='pending_recommendation_refresh')
+    requested_at = models.DateTimeField(help_text="Latest time a refresh was requested")
+    
+    # Type annotation for the objects manager to help type checkers
+    if TYPE_CHECKING:
+        objects: 'Manager'
+    
+    class Meta:
+        ordering = ['requested_at']
+        verbose_name = "Pending Recommendation Refresh"
+        verbose_name_plural = "Pending Recommendation Refreshes"
+    
+    def __str__(self) -> str:
+        return f"{self.student} - {self.requested_at}"
+    
+    @classmethod
+    def request(cls, student_ids) -> None:
+        """
+        Queue the given students for a refresh. A student already queued has
+        their request time moved forward, so a refresh already under way does
+        not take them off the queue.
+        """
+        from django.utils import timezone
+        
+        now = timezone.now()
+        cls.objects.bulk_create(
+            [cls(student_id=student_id, requested_at=now) for student_id in sorted(set(student_ids))],
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=['requested_at']
+        )
+
+class CourseCoEnrollment(models.Model):
+    """
+    Sparse course x course matrix of how many students are enrolled in both
+    courses, stored in both directions so a course's neighbours are one index
+    range. The diagonal row of a course holds its own enrollment count.
+    Pairs nobody shares have no row.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='co_enrollments')
+    other_course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    count: int = models.IntegerField(default=0)  # type: ignore
+    
+    # Type annotation for the objects manager to help type checkers
+    if TYPE_CHECKING:
+        objects: 'Manager'
+    
+    class Meta:
+        unique_together = ['course', 'other_course']
+        verbose_name = "Course Co-enrollment"
+        verbose_name_plural = "Course Co-enrollments"
+    
+    def __str__(self) -> str:
+        return f"{self.course} & {self.other_course}: {self.count}"
+    
+    @classmethod
+    def record_enrollment(cls, course_id, other_course_ids, sign=1) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) an enrollment in a course, whose
+        student is also enrolled in other_course_ids, from the counts.
+        """
+        pairs = [(course_id, course_id)]
+        for other_course_id in other_course_ids:
+            pairs += [(course_id, other_course_id), (other_course_id, course_id)]
+        for pair_course_id, pair_other_course_id in pairs:
+            _add_to_counters(cls, {'course_id': pair_course_id, 'other_course_id': pair_other_course_id}, {'count': sign})
+        
+        if sign < 0:
+            # Keep the matrix sparse
+            cls.objects.filter(Q(course_id=course_id) | Q(other_course_id=course_id), count__lte=0).delete()
+    
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        Recount every pair from the enrollments.
+        Returns the number of rows written.
+        """
+        from collections import Counter
+        
+        courses_by_student = {}
+        for student_id, course_id in Enrollment.objects.values_list('student_id', 'course_id').order_by():
+            courses_by_student.setdefault(student_id, []).append(course_id)
+        
+        counts = Counter()
+        for course_ids in courses_by_student.values():
+            for course_id in course_ids:
+                for other_course_id in course_ids:
+                    counts[(course_id, other_course_id)] += 1
+        
+        rows = [
+            cls(course_id=course_id, other_course_id=other_course_id, count=count)
+            for (course_id, other_course_id), count in counts.items()
+        ]
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+class CoursePrerequisiteClosure(models.Model):
+    """
+    Transitive closure of Course.prerequisites: one row for every course a
+    course requires, directly or through a chain of prerequisites, so
+    eligibility is a single lookup however deep the chain is. Rebuilt
+    whenever a prerequisite is added or removed.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='prerequisite_closure')
+    prerequisite = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    depth: int = models.PositiveIntegerField(help_text="Length of the shortest prerequisite chain, 1 for a direct prerequisite")  # type: ignore
+    
+    # Type annotation for the objects manager to help type checkers
+    if TYPE_CHECKING:
+        objects: 'Manager'
+    
+    class Meta:
+        unique_together = ['course', 'prerequisite']
+        verbose_name = "Course Prerequisite Closure"
+        verbose_name_plural = "Course Prerequisite Closures"
+    
+    def __str__(self) -> str:
+        return f"{self.course} requires {self.prerequisite}"
+    
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        Recompute the closure from the direct prerequisites.
+        Returns the number of rows written.
+        """
+        requires = {}
+        for course_id, prerequisite_id in Course.prerequisites.through.objects.values_list(
+            'from_course_id', 'to_course_id'
+        ):
+            requires.setdefault(course_id, []).append(prerequisite_id)
+        
+        rows = []
+        for course_id, direct in requires.items():
+            # Breadth-first, so each prerequisite is first reached by its shortest chain
+            depths = {}
+            frontier = direct
+            depth = 1
+            while frontier:
+                next_frontier = []
+                for prerequisite_id in frontier:
+                    if prerequisite_id in depths:
+                        continue
+                    depths[prerequisite_id] = depth
+                    next_frontier += requires.get(prerequisite_id, [])
+                frontier = next_frontier
+                depth += 1
+            rows += [
+                cls(course_id=course_id, prerequisite_id=prerequisite_id, depth=depth)
+                for prerequisite_id, depth in depths.items()
+            ]
+        
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+    
+    @classmethod
+    def missing_for(cls, student, course_field='pk') -> Exists:
+        """
+        Exists() expression that is true for the courses the student has not
+        passed every prerequisite of. course_field names the course in the
+        outer query; negate it to keep the courses the student can take.
+        """
+        passed = Grade.objects.filter(student=student, grade__in=Grade.PASSING_GRADES).order_by().values('course_id')
+        return Exists(cls.objects.filter(course_id=OuterRef(course_field)).exclude(prerequisite_id__in=passed))
 
 class StudentDashboardPlugin(CMSPlugin):
     """
@@ -215,124 +1082,283 @@ class StudentDashboardPlugin(CMSPlugin):
         In a real implementation, this would likely get the student ID from the session
         or request context. For now, we'll return sample data or data for a specific student.
         """
-        from django.core.cache import cache
-        from django.db.models import Count, Q
-        from django.utils import timezone
+        from .caching import STUDENT_DASHBOARD_CACHE_TIMEOUT, get_or_build
         
         # Create a cache key
         cache_key = f"student_dashboard_{student_id or 'sample'}"
         
-        # Try to get data from cache
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
+        # Entries are rebuilt by a single worker, and dropped as soon as a row they depend on changes
+        return get_or_build(
+            cache_key,
+            lambda: self._build_student_data(student_id),
+            STUDENT_DASHBOARD_CACHE_TIMEOUT,
+            tracked=True
+        )
+    
+    def get_student_data_version(self, student_id=None):
+        """
+        Return a token that changes whenever get_student_data(student_id) would
+        return different data, or None if it cannot be determined.
+        """
+        from .caching import get_current_versions
+        
+        cache_key = f"student_dashboard_{student_id or 'sample'}"
+        versions = get_current_versions(cache_key)
+        if versions is None:
+            # Nothing current is cached, so the data has to be built anyway
+            self.get_student_data(student_id)
+            versions = get_current_versions(cache_key)
+        
+        return None if versions is None else sorted(versions.items())
+    
+    def get_students_data(self, student_ids):
+        """
+        Fetch dashboard data for several students at once, keyed by student ID.
+        Cached dashboards are reused and all misses are built with one set of bulk queries.
+        """
+        from .caching import STUDENT_DASHBOARD_CACHE_TIMEOUT, get_many_current, set_many_tracked
+
+        student_ids = list(dict.fromkeys(student_id for student_id in student_ids if student_id))
+        cache_keys = {student_id: f"student_dashboard_{student_id}" for student_id in student_ids}
+
+        cached_data = get_many_current(cache_keys.values())
+        data = {
+            student_id: cached_data[cache_key]
+            for student_id, cache_key in cache_keys.items()
+            if cache_key in cached_data
+        }
+
+        missing = [student_id for student_id in student_ids if student_id not in data]
+        if missing:
+            built = self._build_students_data(missing)
+            set_many_tracked(
+                {cache_keys[student_id]: result for student_id, result in built.items()},
+                STUDENT_DASHBOARD_CACHE_TIMEOUT
+            )
+            data.update({student_id: result[0] for student_id, result in built.items()})
+
+        return {student_id: data[student_id] for student_id in student_ids}
+
+    def _build_students_data(self, student_ids):
+        """
+        Build {student_id: (data, dependency_versions)} for several students using
+        a constant number of queries regardless of how many students are requested.
+        """
+        from django.db.models import F, Window
+        from django.db.models.functions import RowNumber
+        from .caching import (
+            course_dependency,
+            get_dependency_versions,
+            student_code_dependency,
+            student_dependency,
+        )
+
+        # Dependency versions are read before querying so concurrent writes still invalidate
+        code_versions = get_dependency_versions(
+            student_code_dependency(student_id) for student_id in student_ids
+        )
+        students = list(Student.objects.filter(student_id__in=student_ids))
+        student_versions = get_dependency_versions(
+            student_dependency(student.pk) for student in students
+        )
+
+        enrollments_by_student = {}
+        for enrollment in Enrollment.objects.filter(
+            student__in=students,
+            is_active=True
+        ).select_related('course'):
+            enrollments_by_student.setdefault(enrollment.student_id, []).append(enrollment)
+
+        summaries_by_student = {}
+        for summary in AttendanceSummary.objects.filter(student__in=students, month__isnull=True):
+            summaries_by_student.setdefault(summary.student_id, {})[summary.course_id] = summary
+
+        # Latest five grades per student in a single query
+        grades_by_student = {}
+        for grade in Grade.objects.filter(student__in=students).annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('student_id'),
+                order_by=F('date_recorded').desc()
+            )
+        ).filter(row_number__lte=5).select_related('course').order_by('student_id', 'row_number'):
+            grades_by_student.setdefault(grade.student_id, []).append(grade)
+
+        course_ids = {
+            enrollment.course_id
+            for enrollments in enrollments_by_student.values()
+            for enrollment in enrollments
+        } | {
+            grade.course_id
+            for grades in grades_by_student.values()
+            for grade in grades
+        }
+        versions = {
+            **code_versions,
+            **student_versions,
+            **get_dependency_versions(course_dependency(course_id) for course_id in course_ids)
+        }
+
+        built = {}
+        for student in students:
+            enrollments = enrollments_by_student.get(student.pk, [])
+            grades = grades_by_student.get(student.pk, [])
+
+            dependencies = [student_code_dependency(student.student_id), student_dependency(student.pk)]
+            dependencies += [
+                course_dependency(course_id)
+                for course_id in {enrollment.course_id for enrollment in enrollments}
+                | {grade.course_id for grade in grades}
+            ]
+
+            built[student.student_id] = (
+                self._format_student_data(
+                    student,
+                    enrollments,
+                    summaries_by_student.get(student.pk, {}),
+                    grades
+                ),
+                {dependency: versions[dependency] for dependency in dependencies}
+            )
+
+        # Unknown students get empty data, refreshed once a student with that ID is created
+        for student_id in student_ids:
+            if student_id not in built:
+                dependency = student_code_dependency(student_id)
+                built[student_id] = (self._empty_student_data(), {dependency: code_versions[dependency]})
+
+        return built
+
+    def _build_student_data(self, student_id):
+        """
+        Build the dashboard data for a student, along with the versions of the
+        cache dependencies it was built from.
+        """
+        from .caching import (
+            course_dependency,
+            get_dependency_versions,
+            student_code_dependency,
+            student_dependency,
+        )
+        
+        # Dependency versions are read before querying so concurrent writes still invalidate
+        versions = {}
         
         # If no student_id provided, return empty data
         if not student_id:
-            data = {
-                'student': {
-                    'name': '',
-                    'student_id': '',
-                    'email': ''
-                },
-                'enrolled_courses': [],
-                'attendance_percentage': 0,
-                'recent_grades': []
+            return self._empty_student_data(), versions
+        
+        # Depend on the student code too, so a student created later is picked up
+        versions.update(get_dependency_versions([student_code_dependency(student_id)]))
+        try:
+            # Get the student
+            student = Student.objects.get(student_id=student_id)
+            versions.update(get_dependency_versions([student_dependency(student.pk)]))
+            
+            # Get enrolled courses
+            enrollments = list(Enrollment.objects.filter(
+                student=student, 
+                is_active=True
+            ).select_related('course'))
+            
+            # Read the maintained per-course counters instead of counting raw attendance rows
+            attendance_summaries = {
+                summary.course_id: summary
+                for summary in AttendanceSummary.objects.filter(
+                    student=student,
+                    course_id__in=[enrollment.course_id for enrollment in enrollments],
+                    month__isnull=True
+                )
             }
+            
+            # Get recent grades (last 5)
+            grades = list(Grade.objects.filter(
+                student=student
+            ).select_related('course').order_by('-date_recorded')[:5])
+            
+            data = self._format_student_data(student, enrollments, attendance_summaries, grades)
+            
+            # Course titles, codes and instructors are part of the payload as well
+            versions.update(get_dependency_versions(
+                course_dependency(course_id)
+                for course_id in {enrollment.course_id for enrollment in enrollments}
+                | {grade.course_id for grade in grades}
+            ))
+        except Exception:
+            # Return empty data if student not found or any other error
+            data = self._empty_student_data()
+        
+        return data, versions
+    
+    def _format_student_data(self, student, enrollments, attendance_summaries, grades):
+        """
+        Assemble the dashboard data for a student from already loaded rows.
+        attendance_summaries maps course ids to the student's all-time AttendanceSummary.
+        """
+        enrolled_courses = []
+        total_attendance = 0
+        attendance_count = 0
+        
+        for enrollment in enrollments:
+            # Calculate progress (simplified)
+            progress = 50  # This would be calculated based on actual course progress
+            
+            # Calculate attendance percentage for this course
+            summary = attendance_summaries.get(enrollment.course_id)
+            
+            if summary and summary.total > 0:
+                course_attendance = summary.percentage
+                total_attendance += course_attendance
+                attendance_count += 1
+            else:
+                course_attendance = 0
+            
+            enrolled_courses.append({
+                'id': enrollment.course.id,
+                'title': enrollment.course.title,
+                'code': enrollment.course.code,
+                'instructor': enrollment.course.instructor,
+                'progress': progress,
+                'attendance': round(course_attendance, 1)
+            })
+        
+        # Calculate overall attendance percentage
+        if attendance_count > 0:
+            attendance_percentage = total_attendance / attendance_count
         else:
-            try:
-                # Get the student
-                student = Student.objects.get(student_id=student_id)
-                
-                # Get enrolled courses
-                enrollments = Enrollment.objects.filter(
-                    student=student, 
-                    is_active=True
-                ).select_related('course')
-                
-                enrolled_courses = []
-                total_attendance = 0
-                attendance_count = 0
-                
-                for enrollment in enrollments:
-                    # Calculate progress (simplified)
-                    progress = 50  # This would be calculated based on actual course progress
-                    
-                    # Calculate attendance percentage for this course
-                    total_records = Attendance.objects.filter(
-                        student=student,
-                        course=enrollment.course
-                    ).count()
-                    
-                    if total_records > 0:
-                        present_records = Attendance.objects.filter(
-                            student=student,
-                            course=enrollment.course,
-                            is_present=True
-                        ).count()
-                        
-                        course_attendance = (present_records / total_records) * 100
-                        total_attendance += course_attendance
-                        attendance_count += 1
-                    else:
-                        course_attendance = 0
-                    
-                    enrolled_courses.append({
-                        'id': enrollment.course.id,
-                        'title': enrollment.course.title,
-                        'code': enrollment.course.code,
-                        'instructor': enrollment.course.instructor,
-                        'progress': progress,
-                        'attendance': round(course_attendance, 1)
-                    })
-                
-                # Calculate overall attendance percentage
-                if attendance_count > 0:
-                    attendance_percentage = total_attendance / attendance_count
-                else:
-                    attendance_percentage = 0
-                
-                # Get recent grades (last 5)
-                recent_grades = []
-                grades = Grade.objects.filter(
-                    student=student
-                ).select_related('course').order_by('-date_recorded')[:5]
-                
-                for grade in grades:
-                    recent_grades.append({
-                        'course': grade.course.title,
-                        'course_code': grade.course.code,
-                        'grade': grade.grade,
-                        'date': grade.date_recorded.strftime('%Y-%m-%d')
-                    })
-                
-                data = {
-                    'student': {
-                        'name': student.full_name,
-                        'student_id': student.student_id,
-                        'email': student.email
-                    },
-                    'enrolled_courses': enrolled_courses,
-                    'attendance_percentage': round(attendance_percentage, 1),
-                    'recent_grades': recent_grades
-                }
-            except Exception:
-                # Return empty data if student not found or any other error
-                data = {
-                    'student': {
-                        'name': '',
-                        'student_id': '',
-                        'email': ''
-                    },
-                    'enrolled_courses': [],
-                    'attendance_percentage': 0,
-                    'recent_grades': []
-                }
+            attendance_percentage = 0
         
-        # Cache the data for 10 minutes
-        cache.set(cache_key, data, 600)  # 600 seconds = 10 minutes
+        recent_grades = []
+        for grade in grades:
+            recent_grades.append({
+                'course': grade.course.title,
+                'course_code': grade.course.code,
+                'grade': grade.grade,
+                'date': grade.date_recorded.strftime('%Y-%m-%d')
+            })
         
-        return data
+        return {
+            'student': {
+                'name': student.full_name,
+                'student_id': student.student_id,
+                'email': student.email
+            },
+            'enrolled_courses': enrolled_courses,
+            'attendance_percentage': round(attendance_percentage, 1),
+            'recent_grades': recent_grades
+        }
+    
+    def _empty_student_data(self):
+        return {
+            'student': {
+                'name': '',
+                'student_id': '',
+                'email': ''
+            },
+            'enrolled_courses': [],
+            'attendance_percentage': 0,
+            'recent_grades': []
+        }
 
 class HeroBannerPlugin(CMSPlugin):
     title = models.CharField(max_length=200)
@@ -369,6 +1395,19 @@ class FeaturedAnnouncementsPlugin(CMSPlugin):
             is_published=True
         ).order_by('-created_at')[:self.number_of_items]
     
+    def get_announcements_version(self):
+        """
+        Return a token that changes whenever get_announcements_data() would return different data.
+        """
+        from cms_plugins.models import Announcement
+        from django.db.models import Count, Max
+        
+        announcements = Announcement.objects.filter(is_published=True).aggregate(
+            count=Count('id'),
+            last_updated=Max('updated_at')
+        )
+        return [self.changed_date, announcements['count'], announcements['last_updated']]
+    
     def get_announcements_data(self):
         """
         Returns announcements data in a format suitable for AJAX requests.
@@ -439,6 +1478,32 @@ class UpcomingEventsPlugin(CMSPlugin):
         # Apply ordering and limit
         return events_query.order_by('start_date')[:self.number_of_items]
     
+    def get_events_version(self, category='', date_filter=''):
+        """
+        Return a token that changes whenever get_events_data() would return different data.
+        """
+        from cms_plugins.models import Event
+        from django.db.models import Count, Max, Q
+        from django.utils import timezone
+        
+        now = timezone.now()
+        events = Event.objects.filter(is_published=True).aggregate(
+            count=Count('id'),
+            last_updated=Max('updated_at'),
+            # Events drop out of the list or stop being "future" as they start
+            upcoming=Count('id', filter=Q(start_date__gte=now))
+        )
+        return [
+            self.changed_date,
+            category,
+            date_filter,
+            # The date filters are relative to today
+            now.date(),
+            events['count'],
+            events['last_updated'],
+            events['upcoming'],
+        ]
+    
     def get_events_data(self, category='', date_filter=''):
         """
         Returns events data in a format suitable for AJAX requests.
@@ -785,6 +1850,21 @@ class LiveNotificationsPlugin(CMSPlugin):
             return LiveNotification.objects.filter(user=user, is_read=False).count()
         return 0
     
+    def get_notifications_version(self, user) -> list:
+        """
+        Return a token that changes whenever the notifications or unread count of a user change.
+        """
+        from django.db.models import Count, Max, Q
+        
+        if not user.is_authenticated:
+            return []
+        notifications = LiveNotification.objects.filter(user=user).aggregate(
+            count=Count('id'),
+            unread=Count('id', filter=Q(is_read=False)),
+            latest=Max('timestamp')
+        )
+        return [notifications['count'], notifications['unread'], notifications['latest']]
+    
     def get_notifications(self, user, limit=10) -> list:
         """
         Get the latest notifications for a user.
@@ -824,26 +1904,20 @@ class PerformanceAnalyticsPlugin(CMSPlugin):
     def __str__(self) -> str:
         return str(self.title)
     
-    def get_chart_data(self, user, time_range=None) -> dict:
+    def get_chart_data(self, student, time_range=None) -> dict:
         """
         Get aggregated performance data for charts.
+        student is the viewer's Student record, or None if they have none.
         """
-        if not user.is_authenticated:
-            return {}
-        
         # Use default time range if none provided
         if time_range is None:
             time_range = self.default_time_range
             
         # Import here to avoid circular imports
         from django.utils import timezone
-        from datetime import timedelta
-        from .models import Grade, Attendance, Student, Course, Enrollment
+        from .caching import get_or_build, seconds_until_midnight
         
-        try:
-            # Get the student record for this user
-            student = Student.objects.get(email=user.email)
-        except Student.DoesNotExist:  # type: ignore
+        if not student:
             # If no student record found, return empty data
             return {
                 'academic_performance': [],
@@ -851,8 +1925,29 @@ class PerformanceAnalyticsPlugin(CMSPlugin):
                 'activity_trends': []
             }
         
+        # The window slides at midnight, so the date is part of the key; writes
+        # for the student invalidate it before then
+        today = timezone.localdate()
+        cache_key = f"performance_analytics_{student.pk}_{time_range}_{today.isoformat()}"
+        return get_or_build(
+            cache_key,
+            lambda: self._build_chart_data(student, time_range, today),
+            seconds_until_midnight(),
+            tracked=True
+        )
+    
+    def _build_chart_data(self, student, time_range, end_date):
+        """
+        Build the chart data for a student, along with the versions of the
+        cache dependencies it was built from.
+        """
+        from datetime import timedelta
+        from .caching import course_dependency, get_dependency_versions, student_dependency
+        
+        # Dependency versions are read before querying so concurrent writes still invalidate
+        versions = get_dependency_versions([student_dependency(student.pk)])
+        
         # Calculate date range based on time_range
-        end_date = timezone.now().date()
         if time_range == 'week':
             start_date = end_date - timedelta(days=7)
         elif time_range == 'month':
@@ -864,76 +1959,55 @@ class PerformanceAnalyticsPlugin(CMSPlugin):
         grades = Grade.objects.filter(
             student=student,
             date_recorded__range=[start_date, end_date]
-        ).order_by('date_recorded')
+        ).select_related('course').order_by('date_recorded')
         
         academic_performance = []
-        grade_points = {
-            'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-            'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-            'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-            'D+': 1.3, 'D': 1.0, 'D-': 0.7,
-            'F': 0.0
-        }
-        
         for grade in grades:
             academic_performance.append({
                 'date': grade.date_recorded.isoformat(),
                 'course': grade.course.title,
                 'grade': grade.grade,
-                'points': grade_points.get(grade.grade, 0)
+                'points': Grade.GRADE_POINTS.get(grade.grade, 0)
             })
         
-        # Get attendance data
-        enrollments = Enrollment.objects.filter(student=student)
-        course_ids = [e.course.id for e in enrollments]
-        
-        attendance_records = Attendance.objects.filter(
+        # Attendance and activity come from the per-day rollup, one row per day in range
+        daily_activity = StudentDailyActivity.objects.filter(
             student=student,
-            course_id__in=course_ids,
             date__range=[start_date, end_date]
-        )
-        
-        # Group attendance by date
-        attendance_by_date = {}
-        for record in attendance_records:
-            date_str = record.date.isoformat()
-            if date_str not in attendance_by_date:
-                attendance_by_date[date_str] = {'present': 0, 'total': 0}
-            attendance_by_date[date_str]['total'] += 1
-            if record.is_present:
-                attendance_by_date[date_str]['present'] += 1
+        ).order_by('date')
         
         attendance_rate = []
-        for date, counts in attendance_by_date.items():
-            rate = (counts['present'] / counts['total']) * 100 if counts['total'] > 0 else 0
-            attendance_rate.append({
-                'date': date,
-                'rate': round(rate, 2),
-                'present': counts['present'],
-                'total': counts['total']
-            })
-        
-        # Activity trends (number of activities per day)
-        # For simplicity, we'll use grades and attendance as activities
         activity_trends = []
-        all_dates = set()
-        all_dates.update([g.date_recorded.isoformat() for g in grades])
-        all_dates.update([a.date.isoformat() for a in attendance_records])
-        
-        for date in sorted(all_dates):
-            grade_count = len([g for g in grades if g.date_recorded.isoformat() == date])
-            attendance_count = len([a for a in attendance_records if a.date.isoformat() == date])
-            activity_trends.append({
-                'date': date,
-                'activities': grade_count + attendance_count
-            })
+        for day in daily_activity:
+            date = day.date.isoformat()
+            if day.attendance_total > 0:
+                attendance_rate.append({
+                    'date': date,
+                    'rate': round((day.attendance_present / day.attendance_total) * 100, 2),
+                    'present': day.attendance_present,
+                    'total': day.attendance_total
+                })
+            
+            # Activity trends (number of activities per day)
+            # For simplicity, we'll use grades and attendance as activities
+            activities = day.grade_count + day.attendance_total
+            if activities > 0:
+                activity_trends.append({
+                    'date': date,
+                    'activities': activities
+                })
+        
+        # Course titles are part of the payload as well
+        versions.update(get_dependency_versions(
+            course_dependency(course_id) for course_id in {grade.course_id for grade in grades}
+        ))
         
         return {
             'academic_performance': academic_performance,
             'attendance_rate': attendance_rate,
             'activity_trends': activity_trends,
             'time_range': time_range
-        }
+        }, versions
 
 
 class AttendanceTrackerPlugin(CMSPlugin):
@@ -948,60 +2022,429 @@ class AttendanceTrackerPlugin(CMSPlugin):
     def __str__(self) -> str:
         return str(self.title)
     
+    def mark_attendance(self, entries):
+        """
+        Record many attendance changes for this plugin's date in one transaction.
+        Each entry is a dict with 'enrollment_id', 'status' ('present' or 'absent')
+        and optionally 'is_excused'. Invalid entries are skipped and reported.
+        Returns the roster rows of the enrollments written and a list of per-entry errors.
+        """
+        errors = []
+        valid_entries = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                errors.append({'index': index, 'error': 'Invalid entry'})
+                continue
+            
+            enrollment_id = entry.get('enrollment_id')
+            status = entry.get('status')
+            if not enrollment_id:
+                errors.append({'index': index, 'error': 'Enrollment ID is required'})
+            elif status not in ['present', 'absent']:
+                errors.append({'index': index, 'enrollment_id': enrollment_id, 'error': 'Invalid status value'})
+            elif not str(enrollment_id).isdigit():
+                errors.append({'index': index, 'enrollment_id': enrollment_id, 'error': 'Invalid enrollment ID'})
+            else:
+                valid_entries.append((index, int(enrollment_id), status == 'present', bool(entry.get('is_excused', False))))
+        
+        # Resolve every enrollment in one query, limited to this plugin's course if it has one
+        enrollments = Enrollment.objects.filter(
+            id__in=[enrollment_id for _, enrollment_id, _, _ in valid_entries],
+            is_active=True
+        )
+        if self.course_id:
+            enrollments = enrollments.filter(course_id=self.course_id)
+        enrollments = enrollments.select_related('student', 'course').in_bulk()
+        
+        # A repeated enrollment keeps its last entry, as in bulk_upsert()
+        records = {}
+        for index, enrollment_id, is_present, is_excused in valid_entries:
+            enrollment = enrollments.get(enrollment_id)
+            if enrollment is None:
+                errors.append({'index': index, 'enrollment_id': enrollment_id, 'error': 'Enrollment not found'})
+                continue
+            records[enrollment_id] = Attendance(
+                student_id=enrollment.student_id,
+                course_id=enrollment.course_id,
+                date=self.date,
+                is_present=is_present,
+                is_excused=is_excused
+            )
+        
+        Attendance.bulk_upsert(list(records.values()))
+        
+        errors.sort(key=lambda error: error['index'])
+        rows = [
+            self._format_attendance_row(enrollments[enrollment_id], {
+                'id': attendance.id,
+                'is_present': attendance.is_present,
+                'is_excused': attendance.is_excused
+            })
+            for enrollment_id, attendance in records.items()
+        ]
+        return rows, errors
+    
+    def set_attendance(self, enrollment, is_present):
+        """
+        Mark one enrollment present or absent on this plugin's date.
+        Returns the updated roster row, the roster counters after the change and
+        the roster version the change was applied on top of. The counters are
+        adjusted by the change rather than recounted.
+        """
+        from .caching import ATTENDANCE_COUNTERS_TIMEOUT, get_dependency_versions, set_many_tracked
+        
+        counters = self.get_attendance_counters()
+        
+        with transaction.atomic():
+            # Lock the existing record, if any, so the change is measured from its latest state
+            previous = Attendance.objects.select_for_update().filter(
+                student_id=enrollment.student_id,
+                course_id=enrollment.course_id,
+                date=self.date
+            ).values('is_present', 'is_excused').first()
+            
+            # Insert or update in one statement; an excused flag already recorded is kept
+            attendance = Attendance(
+                student_id=enrollment.student_id,
+                course_id=enrollment.course_id,
+                date=self.date,
+                is_present=is_present,
+                is_excused=previous['is_excused'] if previous else False
+            )
+            Attendance.bulk_upsert([attendance], update_fields=['is_present'])
+        
+        # Rows without a record count as present
+        was_present = previous['is_present'] if previous else True
+        
+        # The counters are stored against the versions left behind by this write,
+        # so a concurrent write landing in between is only picked up on the next recount
+        versions = get_dependency_versions(self._roster_dependencies())
+        marked_present = counters['marked_present'] + int(is_present) - int(was_present)
+        updated_counters = self._format_attendance_counters(counters['total_students'], marked_present, versions)
+        set_many_tracked(
+            {self._counters_cache_key(): (updated_counters, versions)},
+            ATTENDANCE_COUNTERS_TIMEOUT
+        )
+        
+        row = self._format_attendance_row(enrollment, {
+            'id': attendance.id,
+            'is_present': attendance.is_present,
+            'is_excused': attendance.is_excused
+        })
+        return row, updated_counters, counters['version']
+    
+    def get_group_name(self):
+        """
+        Channel layer group of the clients that have this tracker open for its date.
+        """
+        return f"attendance_tracker_{self.pk}_{self.date}"
+    
+    @classmethod
+    def broadcast_attendance(cls, records, deleted=False):
+        """
+        Send the roster rows for Attendance instances that were just saved, or
+        deleted, to the clients of every tracker showing them, together with
+        that tracker's counters.
+        """
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        
+        try:
+            channel_layer = get_channel_layer()
+            if channel_layer is None or not records:
+                return
+            
+            trackers = list(cls.objects.filter(date__in={record.date for record in records}).filter(
+                Q(course_id__in={record.course_id for record in records}) | Q(course__isnull=True)
+            ))
+            if not trackers:
+                return
+            
+            # Narrow down by student and course, then keep the exact pairs
+            enrollments = {
+                (enrollment.student_id, enrollment.course_id): enrollment
+                for enrollment in Enrollment.objects.filter(
+                    is_active=True,
+                    student_id__in={record.student_id for record in records},
+                    course_id__in={record.course_id for record in records}
+                ).select_related('student', 'course')
+            }
+            
+            for tracker in trackers:
+                rows = []
+                for record in records:
+                    enrollment = enrollments.get((record.student_id, record.course_id))
+                    if enrollment is None or record.date != tracker.date:
+                        continue
+                    if tracker.course_id and record.course_id != tracker.course_id:
+                        continue
+                    rows.append(cls._format_attendance_row(enrollment, None if deleted else {
+                        'id': record.pk,
+                        'is_present': record.is_present,
+                        'is_excused': record.is_excused
+                    }))
+                if not rows:
+                    continue
+                
+                async_to_sync(channel_layer.group_send)(tracker.get_group_name(), {
+                    'type': 'attendance_patch',
+                    'rows': rows,
+                    'counters': tracker.get_attendance_counters()
+                })
+        except Exception:
+            # If WebSocket fails, that's okay - the records are still in the database
+            logger.exception("Failed to send WebSocket attendance update")
+    
+    # Page size bounds for get_attendance_page()
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    
+    def get_attendance_page(self, search_query='', after=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Get one page of the roster ordered by student last name, first name and
+        enrollment ID, starting after the cursor returned with the previous page.
+        Keyset pagination keeps pages stable while records are added or edited.
+        Searching matches the start of student names, course titles and codes.
+        Counters for the whole roster are available from get_attendance_counters().
+        Raises ValueError for a malformed cursor.
+        """
+        page_size = max(1, min(int(page_size), self.MAX_PAGE_SIZE))
+        
+        # Read the version first so a concurrent change makes the result look stale
+        version = self.get_roster_version()
+        
+        enrollments = Enrollment.objects.filter(is_active=True)
+        if self.course_id:
+            enrollments = enrollments.filter(course_id=self.course_id)
+        
+        if search_query:
+            enrollments = enrollments.filter(self._roster_search_filter(search_query))
+        
+        if after:
+            last_name, first_name, enrollment_id = self._decode_roster_cursor(after)
+            enrollments = enrollments.filter(
+                Q(student__last_name__gt=last_name) |
+                Q(student__last_name=last_name, student__first_name__gt=first_name) |
+                Q(student__last_name=last_name, student__first_name=first_name, id__gt=enrollment_id)
+            )
+        
+        # Fetch one extra row to know whether there is a next page
+        page = list(
+            enrollments.select_related('student', 'course')
+            .order_by('student__last_name', 'student__first_name', 'id')[:page_size + 1]
+        )
+        has_next = len(page) > page_size
+        page = page[:page_size]
+        
+        # Attendance for exactly the (student, course) pairs on this page
+        pairs = Q()
+        for enrollment in page:
+            pairs |= Q(student_id=enrollment.student_id, course_id=enrollment.course_id)
+        attendance_map = {}
+        if page:
+            attendance_map = {
+                (record['student_id'], record['course_id']): record
+                for record in Attendance.objects.filter(pairs, date=self.date).values(
+                    'id', 'student_id', 'course_id', 'is_present', 'is_excused'
+                )
+            }
+        
+        return {
+            'attendance_data': [
+                self._format_attendance_row(enrollment, attendance_map.get((enrollment.student_id, enrollment.course_id)))
+                for enrollment in page
+            ],
+            'next_cursor': self._encode_roster_cursor(page[-1]) if has_next else None,
+            'version': version
+        }
+    
+    @staticmethod
+    def _roster_search_filter(search_query):
+        """
+        Match enrollments whose student name, course title or course code starts
+        with search_query, ignoring case. Each match is a range over an
+        upper-cased expression index, so no column is scanned. A blank query
+        matches every enrollment.
+        """
+        search_query = search_query.strip()
+        if not search_query:
+            return Q()
+        if not search_query.isascii():
+            # SQLite's UPPER() only folds ASCII, so the index range would miss other letters
+            return (
+                Q(student__last_name__istartswith=search_query) |
+                Q(student__first_name__istartswith=search_query) |
+                Q(course__title__istartswith=search_query) |
+                Q(course__code__istartswith=search_query)
+            )
+        
+        start = search_query.upper()
+        stop = start[:-1] + chr(ord(start[-1]) + 1)
+        
+        students = Student.objects.alias(
+            upper_last_name=Upper('last_name'),
+            upper_first_name=Upper('first_name')
+        ).filter(
+            Q(upper_last_name__gte=start, upper_last_name__lt=stop) |
+            Q(upper_first_name__gte=start, upper_first_name__lt=stop)
+        )
+        courses = Course.objects.alias(
+            upper_title=Upper('title'),
+            upper_code=Upper('code')
+        ).filter(
+            Q(upper_title__gte=start, upper_title__lt=stop) |
+            Q(upper_code__gte=start, upper_code__lt=stop)
+        )
+        return Q(student__in=students.values('id')) | Q(course__in=courses.values('id'))
+    
+    @staticmethod
+    def _encode_roster_cursor(enrollment):
+        import base64
+        import json
+        
+        key = [enrollment.student.last_name, enrollment.student.first_name, enrollment.id]
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+    
+    @staticmethod
+    def _decode_roster_cursor(cursor):
+        import base64
+        import binascii
+        import json
+        
+        try:
+            last_name, first_name, enrollment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if not isinstance(last_name, str) or not isinstance(first_name, str) or not isinstance(enrollment_id, int):
+            raise ValueError("Invalid cursor")
+        return last_name, first_name, enrollment_id
+    
+    def get_attendance_counters(self):
+        """
+        Get the completion counters for this plugin's whole roster, along with
+        the roster version they describe.
+        """
+        from .caching import ATTENDANCE_COUNTERS_TIMEOUT, get_or_build
+        
+        return get_or_build(
+            self._counters_cache_key(),
+            self._build_attendance_counters,
+            ATTENDANCE_COUNTERS_TIMEOUT,
+            tracked=True
+        )
+    
+    def get_roster_version(self):
+        """
+        Return a token that changes whenever an attendance record on this
+        plugin's date or any enrollment changes.
+        """
+        from .caching import get_dependency_versions
+        
+        return self._format_roster_version(get_dependency_versions(self._roster_dependencies()))
+    
+    def _roster_dependencies(self):
+        from .caching import attendance_date_dependency, enrollments_dependency
+        
+        return [attendance_date_dependency(self.date), enrollments_dependency()]
+    
+    def _counters_cache_key(self):
+        return f"attendance_tracker_counters_{self.pk}_{self.date}"
+    
+    def _build_attendance_counters(self):
+        """
+        Count the roster with two aggregate queries. Returns (counters, dependency versions).
+        """
+        from django.db.models import Exists, OuterRef
+        from .caching import get_dependency_versions
+        
+        # Read the versions before querying so a concurrent write invalidates the result
+        versions = get_dependency_versions(self._roster_dependencies())
+        
+        enrollments = Enrollment.objects.filter(is_active=True)
+        absences = Attendance.objects.filter(date=self.date, is_present=False)
+        if self.course_id:
+            enrollments = enrollments.filter(course_id=self.course_id)
+            absences = absences.filter(course_id=self.course_id)
+        
+        total_students = enrollments.count()
+        absent = absences.filter(Exists(enrollments.filter(
+            student_id=OuterRef('student_id'),
+            course_id=OuterRef('course_id')
+        ))).count()
+        
+        return self._format_attendance_counters(total_students, total_students - absent, versions), versions
+    
+    def _format_attendance_counters(self, total_students, marked_present, versions):
+        completion_percentage = (marked_present / total_students * 100) if total_students > 0 else 0
+        return {
+            'completion_percentage': round(completion_percentage, 1),
+            'total_students': total_students,
+            'marked_present': marked_present,
+            'version': self._format_roster_version(versions)
+        }
+    
+    @staticmethod
+    def _format_roster_version(versions):
+        import hashlib
+        
+        return hashlib.md5(repr(sorted(versions.items())).encode()).hexdigest()
+    
+    @staticmethod
+    def _format_attendance_row(enrollment, attendance_record):
+        """
+        Build the roster row for an enrollment from its attendance record as a
+        dict of id, is_present and is_excused, or None if there is none yet.
+        """
+        return {
+            'enrollment_id': enrollment.id,
+            'student_id': enrollment.student.id,
+            'student_name': enrollment.student.full_name,
+            'course_id': enrollment.course.id,
+            'course_name': enrollment.course.title,
+            'course_code': enrollment.course.code,
+            'attendance_id': attendance_record['id'] if attendance_record else None,
+            'is_present': attendance_record['is_present'] if attendance_record else True,
+            'is_excused': attendance_record['is_excused'] if attendance_record else False
+        }
+    
     def get_attendance_data(self, search_query=''):
         """
         Get attendance data for the specified course and date.
         If no course is specified, get data for all courses.
+        The roster is built with one enrollment query and one attendance query.
         """
+        from django.db.models import Exists, OuterRef
+        
+        # Read the version first so a concurrent change makes the result look stale
+        version = self.get_roster_version()
         
         # Get enrollments for the course(s)
         enrollments = Enrollment.objects.filter(is_active=True)
         
-        if self.course:
-            enrollments = enrollments.filter(course=self.course)
+        if self.course_id:
+            enrollments = enrollments.filter(course_id=self.course_id)
         
         # Apply search filter if provided
         if search_query:
-            # Using union of separate queries to avoid type checking errors with Q objects
-            enrollments = (enrollments.filter(student__first_name__icontains=search_query)
-                         .union(enrollments.filter(student__last_name__icontains=search_query))
-                         .union(enrollments.filter(course__title__icontains=search_query))
-                         .union(enrollments.filter(course__code__icontains=search_query)))
-        
-        # Get existing attendance records for this date
-        enrollment_ids = [e.id for e in enrollments]
-        existing_attendance = Attendance.objects.filter(
-            student__enrollment__in=enrollment_ids,
-            date=self.date
-        )
+            enrollments = enrollments.filter(self._roster_search_filter(search_query))
         
-        # Create a mapping of student_id_course_id to attendance status
-        attendance_map = {}
-        for record in existing_attendance:
-            key = f"{record.student.id}_{record.course.id}"
-            attendance_map[key] = {
-                'id': record.id,
-                'is_present': record.is_present,
-                'is_excused': record.is_excused
-            }
+        # Get existing attendance records for this date, for exactly the
+        # (student, course) pairs on the roster
+        existing_attendance = Attendance.objects.filter(date=self.date).filter(Exists(
+            enrollments.filter(student_id=OuterRef('student_id'), course_id=OuterRef('course_id'))
+        ))
+        
+        # Create a mapping of (student_id, course_id) to attendance status
+        attendance_map = {
+            (record['student_id'], record['course_id']): record
+            for record in existing_attendance.values('id', 'student_id', 'course_id', 'is_present', 'is_excused')
+        }
         
         # Build the data structure
-        attendance_data = []
-        for enrollment in enrollments:
-            key = f"{enrollment.student.id}_{enrollment.course.id}"
-            attendance_record = attendance_map.get(key, None)
-            
-            attendance_data.append({
-                'enrollment_id': enrollment.id,
-                'student_id': enrollment.student.id,
-                'student_name': enrollment.student.full_name,
-                'course_id': enrollment.course.id,
-                'course_name': enrollment.course.title,
-                'course_code': enrollment.course.code,
-                'attendance_id': attendance_record['id'] if attendance_record else None,
-                'is_present': attendance_record['is_present'] if attendance_record else True,
-                'is_excused': attendance_record['is_excused'] if attendance_record else False
-            })
+        attendance_data = [
+            self._format_attendance_row(enrollment, attendance_map.get((enrollment.student_id, enrollment.course_id)))
+            for enrollment in enrollments.select_related('student', 'course')
+        ]
         
         # Calculate completion percentage
         total_students = len(attendance_data)
@@ -1012,7 +2455,8 @@ class AttendanceTrackerPlugin(CMSPlugin):
             'attendance_data': attendance_data,
             'completion_percentage': round(completion_percentage, 1),
             'total_students': total_students,
-            'marked_present': marked_present
+            'marked_present': marked_present,
+            'version': version
         }
 
 class StudyRecommendationPlugin(CMSPlugin):
@@ -1033,6 +2477,17 @@ class StudyRecommendationPlugin(CMSPlugin):
         help_text="Number of recommendations to display"
     )  # type: ignore
     
+    SCORING_MODE_CHOICES = [
+        ('profile', 'Grades and interests'),
+        ('similar', 'Courses often taken together'),
+    ]
+    scoring_mode = models.CharField(
+        max_length=20,
+        choices=SCORING_MODE_CHOICES,
+        default='profile',
+        help_text="How courses are picked for a signed-in student"
+    )
+    
     def __str__(self) -> str:
         return str(self.title)
     
@@ -1041,37 +2496,57 @@ class StudyRecommendationPlugin(CMSPlugin):
         Get study material recommendations based on student grades and interests.
         Uses a weighted scoring algorithm to rank materials.
         """
-        from .utils import calculate_recommendation_score
-        
-        # Get all courses that are published
-        courses_query = Course.objects.filter(is_published=True)
+        from .recommendations import recommend_courses, recommend_similar_courses
         
-        # Apply filters if provided
-        if subject_filter:
-            courses_query = courses_query.filter(category=subject_filter)
-            
-        # Convert queryset to list for processing
-        courses = list(courses_query)
-        
-        # Calculate scores for each course
-        scored_courses = []
-        for course in courses:
-            # Calculate recommendation score
-            score = calculate_recommendation_score(student, course, difficulty_filter)
-            
-            # Only include courses with positive scores
-            if score > 0:
-                scored_courses.append({
+        recommendations = []
+        if student and self.scoring_mode == 'similar':
+            # Merge the neighbour lists of the student's courses
+            recommendations = [
+                {
                     'course': course,
                     'score': score,
                     'difficulty_level': self._get_difficulty_level(course)
-                })
-        
-        # Sort by score (descending)
-        scored_courses.sort(key=lambda x: x['score'], reverse=True)
+                }
+                for course, score in recommend_similar_courses(
+                    student,
+                    difficulty_filter=difficulty_filter,
+                    subject_filter=subject_filter,
+                    limit=self.number_of_recommendations
+                )
+            ]
         
-        # Limit to requested number of recommendations
-        recommendations = scored_courses[:self.number_of_recommendations]
+        if student and not recommendations:
+            # Students are served their precomputed rankings, filtered by index lookups.
+            # They are also the fallback when co-enrollments have nothing to suggest
+            recommendations = [
+                {
+                    'course': row.course,
+                    'score': row.score,
+                    'difficulty_level': row.difficulty
+                }
+                for row in StudentRecommendation.get_for_student(
+                    student,
+                    difficulty_filter=difficulty_filter,
+                    subject_filter=subject_filter,
+                    limit=self.number_of_recommendations
+                )
+            ]
+        elif not student:
+            # Without a student every course scores the same, so score the published catalog live
+            recommendations = [
+                {
+                    'course': course,
+                    'score': score,
+                    'difficulty_level': self._get_difficulty_level(course)
+                }
+                for course, score in recommend_courses(
+                    None,
+                    None,
+                    difficulty_filter=difficulty_filter,
+                    subject_filter=subject_filter,
+                    limit=self.number_of_recommendations
+                )
+            ]
         
         # Format for JSON response
         formatted_recommendations = []
@@ -1097,13 +2572,7 @@ class StudyRecommendationPlugin(CMSPlugin):
         """
         Determine difficulty level based on course credits and category.
         """
-        # Simple heuristic: higher credits = higher difficulty
-        if course.credits >= 4:
-            return "Advanced"
-        elif course.credits >= 3:
-            return "Intermediate"
-        else:
-            return "Beginner"
+        return course.difficulty_level
     
     def get_subject_choices(self):
         """
@@ -1115,8 +2584,4 @@ class StudyRecommendationPlugin(CMSPlugin):
         """
         Return available difficulty levels for filtering.
         """
-        return [
-            ('Beginner', 'Beginner'),
-            ('Intermediate', 'Intermediate'),
-            ('Advanced', 'Advanced')
-        ]
+        return Course.DIFFICULTY_CHOICES
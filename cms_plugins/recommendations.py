@@ -0,0 +1,238 @@
+"""
+Catalog-wide recommendation scoring.
+
+With NumPy installed, the published catalog is held as column arrays and every
+course is scored for a student in a handful of vectorized operations, with a
+partial top-k selection. Without it, courses are scored one by one with
+utils.calculate_recommendation_score(). Both give the same scores and order.
+"""
+import heapq
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+from django.db.models import F
+
+from .caching import courses_dependency, get_dependency_versions, is_fresh_local_copy
+from .models import Course
+from .utils import calculate_recommendation_score
+
+DIFFICULTY_LEVELS = [level for level, _ in Course.DIFFICULTY_CHOICES]
+
+# Categories that get a slight boost, as in calculate_recommendation_score()
+POPULAR_CATEGORIES = ['technology', 'science', 'business']
+
+_catalog_lock = threading.Lock()
+_catalog = None
+
+
+class CourseCatalog:
+    """
+    The published courses in their default order, with one array per scored attribute.
+    """
+
+    def __init__(self, courses):
+        self.courses = courses
+        self.categories = sorted({course.category for course in courses})
+        category_codes = {category: code for code, category in enumerate(self.categories)}
+
+        self.ids = np.array([course.id for course in courses], dtype=np.int64)
+        self.category_codes = np.array([category_codes[course.category] for course in courses], dtype=np.int64)
+        self.credits = np.array([course.credits for course in courses], dtype=np.int64)
+        self.difficulty_codes = np.array(
+            [DIFFICULTY_LEVELS.index(course.difficulty_level) for course in courses], dtype=np.int64
+        )
+        self.published = np.array([course.is_published for course in courses], dtype=bool)
+        self.popular = np.isin(self.category_codes, [
+            category_codes[category] for category in POPULAR_CATEGORIES if category in category_codes
+        ])
+
+    def category_mask(self, categories):
+        """
+        Boolean array marking the courses in any of the given categories.
+        """
+        codes = [code for code, category in enumerate(self.categories) if category in categories]
+        return np.isin(self.category_codes, codes)
+
+    def difficulty_mask(self, difficulty):
+        """
+        Boolean array marking the courses of a difficulty level.
+        """
+        matches = [code for code, level in enumerate(DIFFICULTY_LEVELS) if level.lower() == difficulty.lower()]
+        return np.isin(self.difficulty_codes, matches)
+
+    def score(self, profile=None):
+        """
+        Score every course like calculate_recommendation_score() does, with the
+        terms added in the same order so the floating point results are identical.
+        """
+        if profile is None:
+            return np.full(len(self.courses), 50.0)
+
+        averages = np.full(len(self.categories), np.nan)
+        for code, category in enumerate(self.categories):
+            if category in profile.category_averages:
+                averages[code] = profile.category_averages[category]
+        course_averages = averages[self.category_codes]
+        has_grades = ~np.isnan(course_averages)
+
+        # 1. Grade-based scoring
+        scores = np.zeros(len(self.courses))
+        scores += np.where(has_grades, (np.nan_to_num(course_averages) * 25) * 0.4, 15 * 0.4)
+
+        # 2. Interest-based scoring
+        enrolled_category = self.category_mask(profile.enrolled_categories)
+        scores += np.where(enrolled_category, 20 * 0.3, np.where(has_grades, 15 * 0.3, 5 * 0.3))
+
+        # 3. Enrollment-based scoring
+        enrolled = np.isin(self.ids, list(profile.enrolled_course_ids))
+        scores += np.where(enrolled, -30.0, 10 * 0.2)
+
+        # 4. Category popularity scoring
+        scores += np.where(self.popular, 5 * 0.1, 0.0)
+
+        return np.maximum(scores, 0)
+
+
+def get_catalog():
+    """
+    Return the CourseCatalog of all courses, rebuilt when a course changes.
+    """
+    global _catalog
+
+    # Read the version before querying so a concurrent write forces a rebuild
+    versions = get_dependency_versions([courses_dependency()])
+    with _catalog_lock:
+        if _catalog is not None and _catalog[0] == versions and is_fresh_local_copy(_catalog[2]):
+            return _catalog[1]
+
+    built_at = time.monotonic()
+    catalog = CourseCatalog(list(Course.objects.all()))
+    with _catalog_lock:
+        _catalog = (versions, catalog, built_at)
+    return catalog
+
+
+def top_k(scores, candidates, k):
+    """
+    Indices of the k highest positive scores among the candidate courses, best
+    first, or of all of them if k is None. Equal scores keep catalog order,
+    as with a stable sort.
+    """
+    indices = np.flatnonzero(candidates & (scores > 0))
+    if k is None:
+        k = len(indices)
+    if k <= 0 or not len(indices):
+        return []
+
+    if len(indices) > k:
+        # Find the k-th best score without sorting everything, then keep all
+        # courses above it and the earliest courses equal to it
+        threshold = np.partition(scores[indices], len(indices) - k)[len(indices) - k]
+        above = indices[scores[indices] > threshold]
+        tied = indices[scores[indices] == threshold][:k - len(above)]
+        indices = np.concatenate([above, tied])
+
+    # Sort by score, descending, then by position in the catalog
+    return indices[np.lexsort((indices, -scores[indices]))].tolist()
+
+
+def recommend_courses(student, profile, difficulty_filter='', subject_filter='', limit=5):
+    """
+    Return [(course, score)] for the best published courses for a student,
+    optionally limited to a difficulty level and a subject category, which are
+    applied before scoring. Since every remaining course matches the difficulty
+    filter, no difficulty boost is added, so scores are the same as in the
+    precomputed StudentRecommendation rows. A limit of None returns every
+    course with a positive score.
+    """
+    if np is None:
+        courses = Course.objects.filter(is_published=True)
+        if difficulty_filter:
+            courses = courses.filter(Course.difficulty_q(difficulty_filter))
+        if subject_filter:
+            courses = courses.filter(category=subject_filter)
+
+        scored = []
+        for course in courses:
+            score = calculate_recommendation_score(student, course, profile=profile)
+            if score > 0:
+                scored.append((course, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    catalog = get_catalog()
+    candidates = catalog.published
+    if difficulty_filter:
+        candidates = candidates & catalog.difficulty_mask(difficulty_filter)
+    if subject_filter:
+        candidates = candidates & (catalog.category_codes == (
+            catalog.categories.index(subject_filter) if subject_filter in catalog.categories else -1
+        ))
+
+    scores = catalog.score(profile if student else None)
+    return [(catalog.courses[index], float(scores[index])) for index in top_k(scores, candidates, limit)]
+
+
+def recommend_similar_courses(student, difficulty_filter='', subject_filter='', limit=5):
+    """
+    Return [(course, score)] for the published courses most often taken together
+    with the student's courses, merged from their CourseCoEnrollment neighbour
+    lists. Courses the student lacks a prerequisite for are left out.
+
+    A course scores the Jaccard similarity of its enrollments with each of the
+    student's courses, averaged with more weight on courses the student did
+    well in, as a percentage.
+    """
+    from .models import CourseCoEnrollment, CoursePrerequisiteClosure, Enrollment, Grade
+
+    grade_points = {
+        course_id: Grade.GRADE_POINTS.get(grade, 0)
+        for course_id, grade in Grade.objects.filter(student=student).values_list('course_id', 'grade')
+    }
+    taken = set(Enrollment.objects.filter(student=student).values_list('course_id', flat=True)) | set(grade_points)
+    if not taken:
+        return []
+
+    # From 0.5 for an F to 1 for an A, and in between for courses without a grade yet
+    weights = {
+        course_id: 0.5 + grade_points[course_id] / 8 if course_id in grade_points else 0.75
+        for course_id in taken
+    }
+
+    neighbours = CourseCoEnrollment.objects.filter(
+        course_id__in=taken,
+        other_course__is_published=True
+    ).exclude(other_course_id__in=taken).filter(
+        ~CoursePrerequisiteClosure.missing_for(student, 'other_course_id')
+    ).select_related('other_course')
+    if difficulty_filter:
+        neighbours = neighbours.filter(Course.difficulty_q(difficulty_filter, 'other_course__credits'))
+    if subject_filter:
+        neighbours = neighbours.filter(other_course__category=subject_filter)
+    neighbours = list(neighbours)
+    if not neighbours:
+        return []
+
+    # Enrollment counts live on the diagonal
+    enrollment_counts = dict(CourseCoEnrollment.objects.filter(
+        course_id=F('other_course_id'),
+        course_id__in=taken | {row.other_course_id for row in neighbours}
+    ).values_list('course_id', 'count'))
+
+    scores = {}
+    courses = {}
+    for row in neighbours:
+        union = enrollment_counts.get(row.course_id, 0) + enrollment_counts.get(row.other_course_id, 0) - row.count
+        if union <= 0:
+            continue
+        scores[row.other_course_id] = scores.get(row.other_course_id, 0) + weights[row.course_id] * row.count / union
+        courses[row.other_course_id] = row.other_course
+
+    total_weight = sum(weights.values())
+    best = heapq.nsmallest(limit, scores, key=lambda course_id: (-scores[course_id], courses[course_id].title, course_id))
+    return [(courses[course_id], 100 * scores[course_id] / total_weight) for course_id in best]
@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/notifications/(?P<user_id>\w+)/$', consumers.NotificationConsumer.as_asgi()),
+    re_path(r'ws/attendance-tracker/(?P<plugin_id>\d+)/$', consumers.AttendanceTrackerConsumer.as_asgi()),
 ]
\ No newline at end of file
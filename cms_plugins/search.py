@@ -0,0 +1,170 @@
+"""
+Full-text search over the course catalog.
+
+Queries are split into words and every word is matched as a prefix, so
+results narrow as a visitor types. Matches are ranked by relevance, with
+title and code counting most. The backend is picked from the database in
+use:
+
+- SQLite: an FTS5 table kept in step with Course on save and delete.
+- PostgreSQL: tsvector ranking computed by the database.
+- Anything else: a single case-insensitive scan without ranking.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Created by migration 0032_course_search_index
+COURSE_FTS_TABLE = 'cms_plugins_course_fts'
+
+# Indexed fields in FTS column order, with their bm25() weights
+COURSE_SEARCH_FIELDS = [
+    ('title', 10.0),
+    ('code', 10.0),
+    ('instructor', 2.0),
+    ('description', 1.0),
+]
+
+# Words of a search query; anything else would be FTS query syntax
+_WORD_RE = re.compile(r'\w+')
+
+
+def search_terms(query):
+    """
+    Split a search query into the words to match.
+    """
+    return _WORD_RE.findall(query.lower())
+
+
+class CourseSearchBackend:
+    """
+    Finds published courses matching a query. Backends with an index of their
+    own keep it current through index_course() and remove_course().
+    """
+
+    def index_course(self, course):
+        pass
+
+    def remove_course(self, course_id):
+        pass
+
+    def rebuild(self):
+        """
+        Reindex every course and return the number of courses indexed.
+        """
+        return 0
+
+    def search(self, queryset, query, limit=10):
+        """
+        Return up to limit courses of queryset matching query, best match first.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        match = Q()
+        for term in terms:
+            match &= (
+                Q(title__icontains=term)
+                | Q(code__icontains=term)
+                | Q(instructor__icontains=term)
+                | Q(description__icontains=term)
+            )
+        return list(queryset.filter(match)[:limit])
+
+
+class SQLiteCourseSearchBackend(CourseSearchBackend):
+    """
+    Searches the FTS5 table, whose rowid is the course ID.
+    """
+
+    def _match_expression(self, query):
+        # Quote each word so it is never read as FTS syntax, and match it as a prefix
+        return ' '.join(f'"{term}"*' for term in search_terms(query))
+
+    def index_course(self, course):
+        columns = ', '.join(field for field, _ in COURSE_SEARCH_FIELDS)
+        placeholders = ', '.join(['%s'] * len(COURSE_SEARCH_FIELDS))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {COURSE_FTS_TABLE} WHERE rowid = %s", [course.pk])
+            cursor.execute(
+                f"INSERT INTO {COURSE_FTS_TABLE} (rowid, {columns}) VALUES (%s, {placeholders})",
+                [course.pk, *(getattr(course, field) for field, _ in COURSE_SEARCH_FIELDS)]
+            )
+
+    def remove_course(self, course_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {COURSE_FTS_TABLE} WHERE rowid = %s", [course_id])
+
+    def rebuild(self):
+        from .models import Course
+
+        columns = ', '.join(field for field, _ in COURSE_SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {COURSE_FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {COURSE_FTS_TABLE} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM {Course._meta.db_table}"
+            )
+        return Course.objects.count()
+
+    def search(self, queryset, query, limit=10):
+        match = self._match_expression(query)
+        if not match:
+            return []
+
+        weights = ', '.join(str(weight) for _, weight in COURSE_SEARCH_FIELDS)
+        matching_ids = f"SELECT rowid FROM {COURSE_FTS_TABLE} WHERE {COURSE_FTS_TABLE} MATCH %s"
+
+        # bm25() is lower for better matches
+        with connection.cursor() as cursor:
+            cursor.execute(f"{matching_ids} ORDER BY bm25({COURSE_FTS_TABLE}, {weights}), rowid", [match])
+            ranked_ids = [row[0] for row in cursor.fetchall()]
+
+        # Apply the queryset's own filters to the matches only, then keep the best
+        allowed = set(
+            queryset.filter(pk__in=RawSQL(matching_ids, [match])).values_list('pk', flat=True)
+        )
+        best_ids = [course_id for course_id in ranked_ids if course_id in allowed][:limit]
+        courses = queryset.in_bulk(best_ids)
+        return [courses[course_id] for course_id in best_ids]
+
+
+class PostgresCourseSearchBackend(CourseSearchBackend):
+    """
+    Ranks matches with tsvector/tsquery. The vector is computed per query; a
+    stored column or GIN expression index can be added without changing callers.
+    """
+
+    def search(self, queryset, query, limit=10):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        vector = (
+            SearchVector('title', weight='A')
+            + SearchVector('code', weight='A')
+            + SearchVector('instructor', weight='B')
+            + SearchVector('description', weight='C')
+        )
+        search_query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw')
+        return list(
+            queryset.annotate(search=vector, search_rank=SearchRank(vector, search_query))
+            .filter(search=search_query)
+            .order_by('-search_rank', 'pk')[:limit]
+        )
+
+
+def get_search_backend():
+    """
+    Return the course search backend for the database in use.
+    """
+    if connection.vendor == 'sqlite':
+        return SQLiteCourseSearchBackend()
+    if connection.vendor == 'postgresql':
+        return PostgresCourseSearchBackend()
+    return CourseSearchBackend()
@@ -1,8 +1,38 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
-from .models import LiveNotification
+from .caching import (
+    attendance_date_dependency,
+    bump_dependencies,
+    course_dependency,
+    courses_dependency,
+    enrollments_dependency,
+    student_code_dependency,
+    student_dependency,
+    students_dependency,
+)
+from .search import get_search_backend
+from .models import (
+    LiveNotification,
+    Student,
+    Course,
+    Enrollment,
+    Grade,
+    Attendance,
+    AttendanceSummary,
+    AttendanceTrackerPlugin,
+    CourseCoEnrollment,
+    CoursePrerequisiteClosure,
+    PendingRecommendationRefresh,
+    StudentDailyActivity,
+)
+
+logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=LiveNotification)
 def send_notification_via_websocket(sender, instance, created, **kwargs):
@@ -33,6 +63,302 @@ def send_notification_via_websocket(sender, instance, created, **kwargs):
                         'notification_data': notification_data
                     }
                 )
-        except Exception as e:
+        except Exception:
             # If WebSocket fails, that's okay - the notification is still in the database
-            print(f"Failed to send WebSocket notification: {e}")
\ No newline at end of file
+            logger.exception("Failed to send WebSocket notification %s", instance.pk)
+
+@receiver([post_save, post_delete], sender=Student)
+def invalidate_student_caches(sender, instance, **kwargs):
+    """
+    Invalidate cached data built from a student row when it changes.
+    """
+    bump_dependencies(
+        student_dependency(instance.pk),
+        student_code_dependency(instance.student_id),
+        students_dependency()
+    )
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def link_student_to_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Link a saved user account to the student with the same email address, if it is unambiguous.
+    """
+    # Signing in saves the user with update_fields={'last_login'}, which cannot change the link
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    if instance.email:
+        Student.link_user_accounts([instance.email])
+
+@receiver(post_save, sender=Student)
+def link_user_to_student(sender, instance, raw=False, **kwargs):
+    """
+    Link a saved student without an account to the user with the same email address, if it is unambiguous.
+    """
+    if not raw and instance.user_id is None and instance.email:
+        Student.link_user_accounts([instance.email])
+
+@receiver([post_save, post_delete], sender=Enrollment)
+@receiver([post_save, post_delete], sender=Grade)
+@receiver([post_save, post_delete], sender=Attendance)
+def invalidate_student_record_caches(sender, instance, **kwargs):
+    """
+    Invalidate cached data for the student an enrollment, grade or attendance record belongs to.
+    """
+    bump_dependencies(student_dependency(instance.student_id))
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_roster_caches(sender, instance, **kwargs):
+    """
+    Invalidate cached attendance roster counters when an enrollment changes.
+    """
+    bump_dependencies(enrollments_dependency())
+
+@receiver([post_save, post_delete], sender=Attendance)
+def invalidate_attendance_date_caches(sender, instance, **kwargs):
+    """
+    Invalidate cached data covering the date of an attendance record, and its
+    previous date if the record was moved.
+    """
+    dates = {instance.date}
+    previous = getattr(instance, '_previous_attendance', None)
+    if previous:
+        dates.add(previous['date'])
+    bump_dependencies(*(attendance_date_dependency(date) for date in dates))
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_caches(sender, instance, **kwargs):
+    """
+    Invalidate cached data that includes details of a course.
+    """
+    bump_dependencies(course_dependency(instance.pk), courses_dependency())
+
+@receiver(pre_save, sender=Attendance)
+def remember_previous_attendance(sender, instance, raw=False, **kwargs):
+    """
+    Keep the stored state of an attendance record so post_save can work out what changed.
+    """
+    instance._previous_attendance = None
+    if instance.pk and not raw:
+        instance._previous_attendance = Attendance.objects.filter(pk=instance.pk).values(
+            'student_id', 'course_id', 'date', 'is_present', 'is_excused'
+        ).first()
+
+@receiver(post_save, sender=Attendance)
+def update_attendance_rollups_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Move an attendance record's contribution in the summary and daily activity
+    counters from its old state to its new one.
+    """
+    if raw:
+        return
+
+    current = {
+        'student_id': instance.student_id,
+        'course_id': instance.course_id,
+        'date': instance.date,
+        'is_present': instance.is_present,
+        'is_excused': instance.is_excused,
+    }
+    previous = getattr(instance, '_previous_attendance', None)
+    if previous == current:
+        return
+
+    with transaction.atomic():
+        if previous:
+            AttendanceSummary.record(sign=-1, **previous)
+            StudentDailyActivity.record_attendance(
+                previous['student_id'], previous['date'], previous['is_present'], sign=-1
+            )
+        AttendanceSummary.record(**current)
+        StudentDailyActivity.record_attendance(instance.student_id, instance.date, instance.is_present)
+
+@receiver(post_delete, sender=Attendance)
+def update_attendance_rollups_on_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted attendance record from the summary and daily activity counters.
+    """
+    AttendanceSummary.record(
+        instance.student_id,
+        instance.course_id,
+        instance.date,
+        instance.is_present,
+        instance.is_excused,
+        sign=-1
+    )
+    StudentDailyActivity.record_attendance(instance.student_id, instance.date, instance.is_present, sign=-1)
+
+@receiver(pre_save, sender=Grade)
+def remember_previous_grade(sender, instance, raw=False, **kwargs):
+    """
+    Keep the stored state of a grade so post_save can work out what changed.
+    """
+    instance._previous_grade = None
+    if instance.pk and not raw:
+        instance._previous_grade = Grade.objects.filter(pk=instance.pk).values(
+            'student_id', 'date_recorded', 'grade'
+        ).first()
+
+@receiver(post_save, sender=Grade)
+def update_daily_activity_on_grade_save(sender, instance, raw=False, **kwargs):
+    """
+    Move a grade's contribution in the daily activity counters from its old state to its new one.
+    """
+    if raw:
+        return
+
+    current = {
+        'student_id': instance.student_id,
+        'date_recorded': instance.date_recorded,
+        'grade': instance.grade,
+    }
+    previous = getattr(instance, '_previous_grade', None)
+    if previous == current:
+        return
+
+    with transaction.atomic():
+        if previous:
+            StudentDailyActivity.record_grade(
+                previous['student_id'], previous['date_recorded'], previous['grade'], sign=-1
+            )
+        StudentDailyActivity.record_grade(instance.student_id, instance.date_recorded, instance.grade)
+
+@receiver(post_delete, sender=Grade)
+def update_daily_activity_on_grade_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted grade from the daily activity counters.
+    """
+    StudentDailyActivity.record_grade(instance.student_id, instance.date_recorded, instance.grade, sign=-1)
+
+
+@receiver(post_save, sender=Attendance)
+def broadcast_attendance_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Patch the roster of every attendance tracker showing a saved record once it is committed.
+    """
+    if not raw:
+        transaction.on_commit(lambda: AttendanceTrackerPlugin.broadcast_attendance([instance]))
+
+@receiver(post_delete, sender=Attendance)
+def broadcast_attendance_on_delete(sender, instance, **kwargs):
+    """
+    Patch the roster of every attendance tracker showing a deleted record once it is committed.
+    """
+    transaction.on_commit(lambda: AttendanceTrackerPlugin.broadcast_attendance([instance], deleted=True))
+
+@receiver([post_save, post_delete], sender=Enrollment)
+@receiver([post_save, post_delete], sender=Grade)
+def queue_recommendation_refresh(sender, instance, raw=False, **kwargs):
+    """
+    Queue a student's recommendations for rescoring once a change to their
+    grades or enrollments is committed. They are scored live until the
+    refresh_recommendations command has rescored them.
+    """
+    if raw:
+        return
+    
+    student_id = instance.student_id
+    
+    def queue():
+        try:
+            PendingRecommendationRefresh.request([student_id])
+        except Exception:
+            logger.exception("Failed to queue a recommendation refresh for student %s", student_id)
+    
+    # Queued after the commit, so a refresh that started earlier cannot take the student off the queue
+    transaction.on_commit(queue)
+
+@receiver(pre_save, sender=Enrollment)
+def remember_previous_enrollment(sender, instance, raw=False, **kwargs):
+    """
+    Keep the stored state of an enrollment so post_save can work out what changed.
+    """
+    instance._previous_enrollment = None
+    if instance.pk and not raw:
+        instance._previous_enrollment = Enrollment.objects.filter(pk=instance.pk).values(
+            'student_id', 'course_id'
+        ).first()
+
+@receiver(post_save, sender=Enrollment)
+def update_co_enrollments_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Move an enrollment's pairs in the co-enrollment counts from its old student and course to its new ones.
+    """
+    if raw:
+        return
+    
+    current = {'student_id': instance.student_id, 'course_id': instance.course_id}
+    previous = getattr(instance, '_previous_enrollment', None)
+    if previous == current:
+        return
+    
+    with transaction.atomic():
+        if previous:
+            CourseCoEnrollment.record_enrollment(
+                previous['course_id'],
+                Enrollment.objects.filter(student_id=previous['student_id']).exclude(
+                    pk=instance.pk
+                ).values_list('course_id', flat=True),
+                sign=-1
+            )
+        CourseCoEnrollment.record_enrollment(
+            instance.course_id,
+            Enrollment.objects.filter(student_id=instance.student_id).exclude(
+                pk=instance.pk
+            ).values_list('course_id', flat=True)
+        )
+
+@receiver(pre_delete, sender=Enrollment)
+def remember_other_enrollments(sender, instance, **kwargs):
+    """
+    Keep the student's other enrollments before any of them is deleted, since
+    a cascade deletes them all before post_delete is sent for the first one.
+    """
+    instance._other_enrollments = dict(
+        Enrollment.objects.filter(student_id=instance.student_id).exclude(
+            pk=instance.pk
+        ).values_list('pk', 'course_id')
+    )
+
+@receiver(post_delete, sender=Enrollment)
+def update_co_enrollments_on_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted enrollment and its pairs from the co-enrollment counts.
+    """
+    others = getattr(instance, '_other_enrollments', {})
+    remaining = set(Enrollment.objects.filter(pk__in=others).values_list('pk', flat=True))
+    
+    # A pair of enrollments deleted together is removed once, by the later one
+    CourseCoEnrollment.record_enrollment(
+        instance.course_id,
+        [course_id for pk, course_id in others.items() if pk in remaining or pk < instance.pk],
+        sign=-1
+    )
+
+@receiver(m2m_changed, sender=Course.prerequisites.through)
+def rebuild_prerequisite_closure(sender, action, **kwargs):
+    """
+    Recompute the prerequisite closure when a course's prerequisites change.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        CoursePrerequisiteClosure.rebuild()
+
+@receiver(post_delete, sender=Course)
+def rebuild_prerequisite_closure_on_delete(sender, instance, **kwargs):
+    """
+    Recompute the prerequisite closure when a deleted course may have linked a chain.
+    """
+    CoursePrerequisiteClosure.rebuild()
+
+@receiver(post_save, sender=Course)
+def index_course_for_search(sender, instance, **kwargs):
+    """
+    Add a saved course to the search index, replacing its previous entry.
+    """
+    get_search_backend().index_course(instance)
+
+@receiver(post_delete, sender=Course)
+def remove_course_from_search(sender, instance, **kwargs):
+    """
+    Drop a deleted course from the search index.
+    """
+    get_search_backend().remove_course(instance.pk)
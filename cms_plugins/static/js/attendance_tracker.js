@@ -1,4 +1,7 @@
 (function($) {
+    // Number of roster rows fetched per request
+    const PAGE_SIZE = 50;
+    
     $(document).ready(function() {
         // Initialize all attendance tracker plugins
         $('.attendance-tracker').each(function() {
@@ -14,6 +17,13 @@
         const loadingSpinner = container.find('.loading-spinner');
         const successNotification = container.find('#success-notification');
         const errorNotification = container.find('#error-notification');
+        const loadMoreBtn = container.find('.load-more-btn');
+        
+        // Load the first page of the roster
+        searchAttendance(pluginId, '', container, loadingSpinner, tableBody);
+        
+        // Receive changes made by other teachers as they happen
+        connectAttendanceSocket(pluginId, container, tableBody);
         
         // Handle search button click
         searchBtn.on('click', function() {
@@ -28,6 +38,11 @@
             }
         });
         
+        // Handle load more button click
+        loadMoreBtn.on('click', function() {
+            loadMoreAttendance(pluginId, container, loadingSpinner, tableBody);
+        });
+        
         // Handle attendance toggle buttons
         container.on('click', '.btn-toggle-attendance', function() {
             const button = $(this);
@@ -48,17 +63,20 @@
         // Show loading spinner
         loadingSpinner.show();
         
-        // Make AJAX request to get filtered attendance data
+        // Make AJAX request to get the first page of filtered attendance data
         $.ajax({
-            url: `/cms_plugins/attendance-tracker/${pluginId}/update/`,
-            method: 'POST',
+            url: `/cms_plugins/attendance-tracker/${pluginId}/sync/`,
+            method: 'GET',
             data: {
-                'search_query': searchQuery
+                'search_query': searchQuery,
+                'page_size': PAGE_SIZE
             },
             success: function(response) {
                 if (response.success) {
+                    container.data('search-query', searchQuery);
                     updateAttendanceTable(tableBody, response.attendance_data.attendance_data);
                     updateSummary(container, response.attendance_data);
+                    updateLoadMore(container, response.attendance_data.next_cursor);
                 } else {
                     showError(container, response.error || 'Failed to search attendance records.');
                 }
@@ -73,6 +91,95 @@
         });
     }
     
+    function loadMoreAttendance(pluginId, container, loadingSpinner, tableBody) {
+        // Show loading spinner
+        loadingSpinner.show();
+        
+        // Make AJAX request to get the page after the last row shown
+        $.ajax({
+            url: `/cms_plugins/attendance-tracker/${pluginId}/sync/`,
+            method: 'GET',
+            data: {
+                'search_query': container.data('search-query') || '',
+                'page_size': PAGE_SIZE,
+                'after': container.data('next-cursor')
+            },
+            success: function(response) {
+                if (response.success) {
+                    response.attendance_data.attendance_data.forEach(function(item) {
+                        tableBody.append(renderAttendanceRow(item));
+                    });
+                    updateSummary(container, response.attendance_data);
+                    updateLoadMore(container, response.attendance_data.next_cursor);
+                } else {
+                    showError(container, response.error || 'Failed to load attendance records.');
+                }
+            },
+            error: function(xhr, status, error) {
+                showError(container, 'Failed to load attendance records. Please try again.');
+            },
+            complete: function() {
+                // Hide loading spinner
+                loadingSpinner.hide();
+            }
+        });
+    }
+    
+    function resyncAttendance(pluginId, container) {
+        // Reload the first page we are showing; the server answers 304 if nothing changed
+        $.ajax({
+            url: `/cms_plugins/attendance-tracker/${pluginId}/sync/`,
+            method: 'GET',
+            ifModified: true,
+            data: {
+                'search_query': container.data('search-query') || '',
+                'page_size': PAGE_SIZE
+            },
+            success: function(response, status) {
+                if (status !== 'notmodified' && response && response.success) {
+                    const tableBody = container.find('#attendance-table-body');
+                    updateAttendanceTable(tableBody, response.attendance_data.attendance_data);
+                    updateSummary(container, response.attendance_data);
+                    updateLoadMore(container, response.attendance_data.next_cursor);
+                }
+            }
+        });
+    }
+    
+    function connectAttendanceSocket(pluginId, container, tableBody) {
+        try {
+            const wsUrl = `ws://${window.location.host}/ws/attendance-tracker/${pluginId}/`;
+            const ws = new WebSocket(wsUrl);
+            
+            ws.onmessage = function(event) {
+                const data = JSON.parse(event.data);
+                if (data.type === 'attendance_patch') {
+                    applyAttendancePatch(container, tableBody, data.rows, data.counters);
+                }
+            };
+            
+            ws.onerror = function(error) {
+                console.error('WebSocket error:', error);
+            };
+        } catch (e) {
+            console.error('Failed to establish WebSocket connection:', e);
+        }
+    }
+    
+    function applyAttendancePatch(container, tableBody, rows, counters) {
+        // Only rows already on screen are replaced; others show up when their page is loaded
+        rows.forEach(function(item) {
+            tableBody.find(`tr[data-enrollment-id="${item.enrollment_id}"]`)
+                .replaceWith(renderAttendanceRow(item));
+        });
+        updateSummary(container, counters);
+    }
+    
+    function updateLoadMore(container, nextCursor) {
+        container.data('next-cursor', nextCursor);
+        container.find('.load-more-btn').toggle(Boolean(nextCursor));
+    }
+    
     function updateAttendance(pluginId, enrollmentId, newStatus, container, loadingSpinner, successNotification, errorNotification) {
         // Show loading spinner
         loadingSpinner.show();
@@ -83,14 +190,19 @@
             method: 'POST',
             data: {
                 'enrollment_id': enrollmentId,
-                'status': newStatus
+                'status': newStatus,
+                'version': container.data('version')
             },
             success: function(response) {
                 if (response.success) {
-                    // Update the UI with the new data
+                    // Patch the changed row and counters only
                     const tableBody = container.find('#attendance-table-body');
-                    updateAttendanceTable(tableBody, response.attendance_data.attendance_data);
-                    updateSummary(container, response.attendance_data);
+                    applyAttendancePatch(container, tableBody, [response.row], response.counters);
+                    
+                    // Someone else changed the roster since we last loaded it
+                    if (response.stale) {
+                        resyncAttendance(pluginId, container);
+                    }
                     
                     // Show success notification
                     showNotification(successNotification, response.message);
@@ -114,34 +226,38 @@
         
         // Add new rows
         attendanceData.forEach(function(item) {
-            const row = `
-                <tr data-enrollment-id="${item.enrollment_id}" data-attendance-id="${item.attendance_id || ''}">
-                    <td>${item.student_name}</td>
-                    <td>${item.course_code} - ${item.course_name}</td>
-                    <td class="status-cell">
-                        <span class="status-badge ${item.is_present ? 'present' : 'absent'}">
-                            ${item.is_present ? 'Present' : 'Absent'}
-                        </span>
-                        ${item.is_excused ? '<span class="excused-badge">Excused</span>' : ''}
-                    </td>
-                    <td class="action-cell">
-                        <button class="btn-toggle-attendance ${item.is_present ? 'present' : 'absent'}" 
-                                data-enrollment="${item.enrollment_id}"
-                                data-status="${item.is_present ? 'present' : 'absent'}">
-                            ${item.is_present ? 'Mark Absent' : 'Mark Present'}
-                        </button>
-                    </td>
-                </tr>
-            `;
-            tableBody.append(row);
+            tableBody.append(renderAttendanceRow(item));
         });
     }
     
+    function renderAttendanceRow(item) {
+        return `
+            <tr data-enrollment-id="${item.enrollment_id}" data-attendance-id="${item.attendance_id || ''}">
+                <td>${item.student_name}</td>
+                <td>${item.course_code} - ${item.course_name}</td>
+                <td class="status-cell">
+                    <span class="status-badge ${item.is_present ? 'present' : 'absent'}">
+                        ${item.is_present ? 'Present' : 'Absent'}
+                    </span>
+                    ${item.is_excused ? '<span class="excused-badge">Excused</span>' : ''}
+                </td>
+                <td class="action-cell">
+                    <button class="btn-toggle-attendance ${item.is_present ? 'present' : 'absent'}" 
+                            data-enrollment="${item.enrollment_id}"
+                            data-status="${item.is_present ? 'present' : 'absent'}">
+                        ${item.is_present ? 'Mark Absent' : 'Mark Present'}
+                    </button>
+                </td>
+            </tr>
+        `;
+    }
+    
     function updateSummary(container, attendanceData) {
         container.find('#completion-percentage').text(attendanceData.completion_percentage + '%');
         container.find('.progress-fill').css('width', attendanceData.completion_percentage + '%');
         container.find('#total-students').text(attendanceData.total_students);
         container.find('#marked-present').text(attendanceData.marked_present);
+        container.data('version', attendanceData.version);
     }
     
     function showNotification(notificationElement, message) {
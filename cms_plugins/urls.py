@@ -8,10 +8,14 @@ urlpatterns = [
     path('live-notifications/<int:plugin_id>/', views.LiveNotificationsAjaxView.as_view(), name='live_notifications_ajax'),
     path('mark-notification-as-read/<int:notification_id>/', views.MarkNotificationAsReadView.as_view(), name='mark_notification_as_read'),
     path('student-dashboard/<int:plugin_id>/', views.StudentDashboardAjaxView.as_view(), name='student_dashboard_ajax'),
+    path('student-dashboard/<int:plugin_id>/batch/', views.StudentDashboardBatchAjaxView.as_view(), name='student_dashboard_batch_ajax'),
     path('featured-announcements/<int:plugin_id>/', views.FeaturedAnnouncementsAjaxView.as_view(), name='featured_announcements_ajax'),
     path('featured-announcements/detail/<int:announcement_id>/', views.FeaturedAnnouncementDetailView.as_view(), name='featured_announcement_detail'),
     path('upcoming-events/<int:plugin_id>/', views.UpcomingEventsAjaxView.as_view(), name='upcoming_events_ajax'),
     path('course-search/', views.CourseSearchAjaxView.as_view(), name='course_search_ajax'),
     path('attendance-tracker/<int:plugin_id>/update/', views.AttendanceTrackerUpdateView.as_view(), name='attendance_tracker_update'),
+    path('attendance-tracker/<int:plugin_id>/sync/', views.AttendanceTrackerSyncView.as_view(), name='attendance_tracker_sync'),
+    path('attendance-tracker/<int:plugin_id>/bulk-update/', views.AttendanceTrackerBulkUpdateView.as_view(), name='attendance_tracker_bulk_update'),
+    path('attendance/check-in/', views.AttendanceCheckInView.as_view(), name='attendance_check_in'),
     path('study-recommendations/<int:plugin_id>/', views.StudyRecommendationsAjaxView.as_view(), name='study_recommendations_ajax'),
 ]
\ No newline at end of file
@@ -43,7 +43,77 @@ def send_notification_to_user(user, message, category='system'):
     
     return notification
 
-def calculate_recommendation_score(student, course, difficulty_filter=''):
+def get_student(request):
+    """
+    Return the Student linked to the request's user, or None.
+    StudentMiddleware resolves it once per request as request.student.
+    """
+    from .models import Student
+    
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    try:
+        return Student.objects.get(user=user)
+    except Student.DoesNotExist:  # type: ignore
+        return None
+
+class StudentProfile:
+    """
+    What the recommendation scoring needs to know about a student, loaded once
+    so that any number of courses can be scored without further queries.
+    
+    Attributes:
+        category_averages: dict of course category -> average grade points
+        enrolled_categories: set of categories of the student's active enrollments
+        enrolled_course_ids: set of IDs of the courses the student is actively enrolled in
+    """
+    
+    def __init__(self, category_averages, enrolled_categories, enrolled_course_ids):
+        self.category_averages = category_averages
+        self.enrolled_categories = enrolled_categories
+        self.enrolled_course_ids = enrolled_course_ids
+    
+    @classmethod
+    def load(cls, student):
+        """
+        Build the profile of a student with two queries.
+        """
+        return cls.load_many([student.pk])[student.pk]
+    
+    @classmethod
+    def load_many(cls, student_ids):
+        """
+        Build the profiles of several students with two queries, keyed by student ID.
+        """
+        from .models import Grade, Enrollment
+        
+        # Sum in the grades' default order so averages match the per-course calculation exactly
+        totals = {student_id: {} for student_id in student_ids}
+        for student_id, category, grade in Grade.objects.filter(student_id__in=student_ids).values_list(
+            'student_id', 'course__category', 'grade'
+        ):
+            points, count = totals[student_id].get(category, (0, 0))
+            totals[student_id][category] = (points + Grade.GRADE_POINTS.get(grade, 0), count + 1)
+        
+        enrollments = {student_id: [] for student_id in student_ids}
+        for student_id, course_id, category in Enrollment.objects.filter(
+            student_id__in=student_ids, is_active=True
+        ).values_list('student_id', 'course_id', 'course__category'):
+            enrollments[student_id].append((course_id, category))
+        
+        return {
+            student_id: cls(
+                category_averages={
+                    category: points / count for category, (points, count) in totals[student_id].items()
+                },
+                enrolled_categories={category for _, category in enrollments[student_id]},
+                enrolled_course_ids={course_id for course_id, _ in enrollments[student_id]}
+            )
+            for student_id in student_ids
+        }
+
+def calculate_recommendation_score(student, course, difficulty_filter='', profile=None):
     """
     Calculate a recommendation score for a course based on student grades and interests.
     Uses a weighted scoring algorithm.
@@ -52,6 +122,8 @@ def calculate_recommendation_score(student, course, difficulty_filter=''):
         student: Student object or None
         course: Course object
         difficulty_filter: String filter for difficulty level
+        profile: StudentProfile of the student, loaded if not given. Pass one
+            when scoring many courses for the same student.
     
     Returns:
         float: Recommendation score (higher is better)
@@ -73,10 +145,10 @@ def calculate_recommendation_score(student, course, difficulty_filter=''):
                 
         return score
     
-    # Get student's grades
+    # Get student's grades and enrollments
     try:
-        from .models import Grade, Enrollment
-        grades = Grade.objects.filter(student=student)
+        if profile is None:
+            profile = StudentProfile.load(student)
         
         # Weight factors
         grade_weight = 0.4
@@ -85,24 +157,9 @@ def calculate_recommendation_score(student, course, difficulty_filter=''):
         category_weight = 0.1
         
         # 1. Grade-based scoring
-        # Find grades in the same category as this course
-        category_grades = grades.filter(course__category=course.category)
-        if category_grades.exists():
-            # Calculate average grade in this category
-            grade_points = {
-                'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-                'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-                'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-                'D+': 1.3, 'D': 1.0, 'D-': 0.7,
-                'F': 0.0
-            }
-            
-            total_points = 0
-            for grade in category_grades:
-                total_points += grade_points.get(grade.grade, 0)
-            
-            avg_grade = total_points / category_grades.count()
-            
+        # Find the average grade in the same category as this course
+        avg_grade = profile.category_averages.get(course.category)
+        if avg_grade is not None:
             # Higher grades in this category = higher recommendation score
             grade_score = avg_grade * 25  # Scale to 100
             score += grade_score * grade_weight
@@ -111,13 +168,10 @@ def calculate_recommendation_score(student, course, difficulty_filter=''):
             score += 15 * grade_weight
         
         # 2. Interest-based scoring (based on currently enrolled courses)
-        enrollments = Enrollment.objects.filter(student=student, is_active=True)
-        enrolled_categories = [e.course.category for e in enrollments]
-        
-        if course.category in enrolled_categories:
+        if course.category in profile.enrolled_categories:
             # Student is currently enrolled in this category
             score += 20 * interest_weight
-        elif category_grades.exists():
+        elif avg_grade is not None:
             # Student has taken courses in this category before
             score += 15 * interest_weight
         else:
@@ -125,7 +179,7 @@ def calculate_recommendation_score(student, course, difficulty_filter=''):
             score += 5 * interest_weight
         
         # 3. Enrollment-based scoring
-        if enrollments.filter(course=course).exists():
+        if course.id in profile.enrolled_course_ids:
             # Student is already enrolled in this course
             score -= 30  # Don't recommend courses they're already taking
         else:
@@ -156,9 +210,4 @@ def _get_course_difficulty(course):
     """
     Determine the difficulty level of a course based on credits.
     """
-    if course.credits >= 4:
-        return "Advanced"
-    elif course.credits >= 3:
-        return "Intermediate"
-    else:
-        return "Beginner"
\ No newline at end of file
+    return course.difficulty_level
\ No newline at end of file
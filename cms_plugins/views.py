@@ -1,6 +1,10 @@
+import hashlib
+import json
+
 from django.shortcuts import render, get_object_or_404
 from django.views.generic import View
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
 from django.utils import dateformat
 from django.utils import timezone
 from django.db.models import Q
@@ -8,10 +12,14 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 
+from .checkin import check_in, get_check_in_counts
+from .search import get_search_backend
+
 from .models import (
     Announcement, 
     Event, 
     Course, 
+    CoursePrerequisiteClosure,
     FeaturedAnnouncementsPlugin, 
     UpcomingEventsPlugin,
     StatisticsCounterPlugin,
@@ -21,12 +29,38 @@ from .models import (
     LiveNotificationsPlugin,
     PerformanceAnalyticsPlugin,
     AttendanceTrackerPlugin,
-    Attendance,
     Enrollment
 )
 
 # Create your views here.
 
+def _make_etag(version):
+    """
+    Build a quoted ETag from a version token returned by a plugin, or None if there is no token.
+    """
+    if version is None:
+        return None
+    return quote_etag(hashlib.md5(repr(version).encode()).hexdigest())
+
+def _etag_matches(request, etag):
+    """
+    Check whether the client already holds the response identified by etag.
+    """
+    if etag is None:
+        return False
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in if_none_match or '*' in if_none_match
+
+def _not_modified_response(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+def _with_etag(response, etag):
+    if etag is not None:
+        response['ETag'] = etag
+    return response
+
 class PerformanceAnalyticsAjaxView(View):
     """
     AJAX view to fetch performance analytics data
@@ -46,9 +80,11 @@ class PerformanceAnalyticsAjaxView(View):
             
             # Get time range from query parameters
             time_range = request.GET.get('time_range', plugin.default_time_range)
+            if time_range not in dict(PerformanceAnalyticsPlugin.TIME_RANGE_CHOICES):
+                time_range = plugin.default_time_range
             
-            # Get chart data for the current user
-            chart_data = plugin.get_chart_data(request.user, time_range)
+            # Get chart data for the current user's student record
+            chart_data = plugin.get_chart_data(request.student, time_range)
             
             # Return JSON response
             return JsonResponse({
@@ -78,16 +114,21 @@ class LiveNotificationsAjaxView(View):
             # Get the plugin instance
             plugin = get_object_or_404(LiveNotificationsPlugin, id=plugin_id)
             
+            # Skip building the payload if the client's copy is still current
+            etag = _make_etag(plugin.get_notifications_version(request.user))
+            if _etag_matches(request, etag):
+                return _not_modified_response(etag)
+            
             # Get notifications for the current user
             notifications = plugin.get_notifications(request.user)
             unread_count = plugin.get_unread_count(request.user)
             
             # Return JSON response
-            return JsonResponse({
+            return _with_etag(JsonResponse({
                 'success': True,
                 'notifications': notifications,
                 'unread_count': unread_count
-            })
+            }), etag)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -138,17 +179,83 @@ class StudentDashboardAjaxView(View):
             # Get the plugin instance
             plugin = get_object_or_404(StudentDashboardPlugin, id=plugin_id)
             
-            # Get student ID from session or request (simplified for demo)
-            # In a real implementation, you would get this from the authenticated user
-            student_id = request.GET.get('student_id', None)
+            # Get the student ID of the signed-in user, if they are a student
+            student = request.student
+            student_id = student.student_id if student else None
+            
+            # Skip serializing the payload if the client's copy is still current
+            etag = _make_etag(plugin.get_student_data_version(student_id))
+            if _etag_matches(request, etag):
+                return _not_modified_response(etag)
             
             # Get student data
             student_data = plugin.get_student_data(student_id)
             
             # Return JSON response
-            return JsonResponse({
+            return _with_etag(JsonResponse({
                 'success': True,
                 'data': student_data
+            }), etag)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+class StudentDashboardBatchAjaxView(View):
+    """
+    AJAX view to fetch dashboard data for several students in one request
+    """
+    
+    # Upper bound on the number of students per request
+    MAX_STUDENTS = 200
+    
+    @method_decorator(login_required)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+    
+    def get(self, request, plugin_id):
+        """
+        Return dashboard data for every student ID passed as a comma separated
+        'student_ids' parameter or as repeated 'student_id' parameters.
+        Only advisors, who hold the view_student permission, may read other students' records.
+        """
+        try:
+            if not request.user.has_perm('cms_plugins.view_student'):
+                return JsonResponse({
+                    'success': False,
+                    'error': 'You are not allowed to view other students\' dashboards'
+                }, status=403)
+            
+            # Get the plugin instance
+            plugin = get_object_or_404(StudentDashboardPlugin, id=plugin_id)
+            
+            # Collect student IDs from both parameter styles
+            student_ids = request.GET.getlist('student_id')
+            for value in request.GET.getlist('student_ids'):
+                student_ids.extend(value.split(','))
+            student_ids = [student_id.strip() for student_id in student_ids if student_id.strip()]
+            
+            # Validate student IDs
+            if not student_ids:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'At least one student ID is required'
+                }, status=400)
+            
+            if len(student_ids) > self.MAX_STUDENTS:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'At most {self.MAX_STUDENTS} student IDs are allowed per request'
+                }, status=400)
+            
+            # Get data for all students
+            students_data = plugin.get_students_data(student_ids)
+            
+            # Return JSON response
+            return JsonResponse({
+                'success': True,
+                'data': students_data
             })
         except Exception as e:
             return JsonResponse({
@@ -169,15 +276,20 @@ class FeaturedAnnouncementsAjaxView(View):
             # Get the plugin instance
             plugin = get_object_or_404(FeaturedAnnouncementsPlugin, id=plugin_id)
             
+            # Skip building the payload if the client's copy is still current
+            etag = _make_etag(plugin.get_announcements_version())
+            if _etag_matches(request, etag):
+                return _not_modified_response(etag)
+            
             # Get announcements data
             announcements_data = plugin.get_announcements_data()
             
             # Return JSON response
-            return JsonResponse({
+            return _with_etag(JsonResponse({
                 'success': True,
                 'announcements': announcements_data,
                 'title': plugin.title
-            })
+            }), etag)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -233,18 +345,23 @@ class UpcomingEventsAjaxView(View):
             category = request.GET.get('category', '')
             date_filter = request.GET.get('date_filter', '')
             
+            # Skip building the payload if the client's copy is still current
+            etag = _make_etag(plugin.get_events_version(category, date_filter))
+            if _etag_matches(request, etag):
+                return _not_modified_response(etag)
+            
             # Get events data with filtering
             events_data = plugin.get_events_data(category, date_filter)
             
             # Return JSON response
-            return JsonResponse({
+            return _with_etag(JsonResponse({
                 'success': True,
                 'events': events_data,
                 'title': plugin.title,
                 'enable_carousel': plugin.enable_carousel,
                 'auto_rotate': plugin.auto_rotate,
                 'rotation_interval': plugin.rotation_interval
-            })
+            }), etag)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -267,21 +384,25 @@ class CourseSearchAjaxView(View):
             # Base query for published courses
             courses_query = Course.objects.filter(is_published=True)
             
-            # Apply search filter if query exists
-            if query:
-                # Using union of separate queries to avoid type checking errors with Q objects
-                courses_query = (courses_query.filter(title__icontains=query)
-                             .union(courses_query.filter(code__icontains=query))
-                             .union(courses_query.filter(description__icontains=query))
-                             .union(courses_query.filter(instructor__icontains=query)))
+            # Tell signed-in students which courses they can take, optionally showing only those
+            student = request.student
+            if student:
+                courses_query = courses_query.annotate(
+                    prerequisites_met=~CoursePrerequisiteClosure.missing_for(student)
+                )
+                if request.GET.get('eligible') == '1':
+                    courses_query = courses_query.filter(prerequisites_met=True)
             
-            # Limit results to 10
-            courses = list(courses_query[:10])
+            # Look the query up in the full-text index, best matches first, limited to 10
+            if query:
+                courses = get_search_backend().search(courses_query, query, limit=10)
+            else:
+                courses = list(courses_query[:10])
             
             # Format data for JSON response
             courses_data = []
             for course in courses:
-                courses_data.append({
+                course_data = {
                     'id': course.id,
                     'title': course.title,
                     'code': course.code,
@@ -290,7 +411,10 @@ class CourseSearchAjaxView(View):
                     'category': course.get_category_display(),
                     'category_key': course.category,
                     'credits': course.credits,
-                })
+                }
+                if student:
+                    course_data['prerequisites_met'] = course.prerequisites_met
+                courses_data.append(course_data)
             
             # Return JSON response
             return JsonResponse({
@@ -325,7 +449,6 @@ class AttendanceTrackerUpdateView(View):
             # Get parameters from POST data
             enrollment_id = request.POST.get('enrollment_id')
             status = request.POST.get('status')  # 'present' or 'absent'
-            search_query = request.POST.get('search_query', '')
             
             # Validate enrollment_id
             if not enrollment_id:
@@ -342,35 +465,218 @@ class AttendanceTrackerUpdateView(View):
                 }, status=400)
             
             # Get the enrollment
-            enrollment = get_object_or_404(Enrollment, id=enrollment_id, is_active=True)
+            enrollment = get_object_or_404(
+                Enrollment.objects.select_related('student', 'course'), id=enrollment_id, is_active=True
+            )
             
             # Determine if student is present
             is_present = (status == 'present')
             
-            # Get or create attendance record for this student, course, and date
-            attendance, created = Attendance.objects.get_or_create(
-                student=enrollment.student,
-                course=enrollment.course,
-                date=plugin.date,
-                defaults={
-                    'is_present': is_present,
-                    'is_excused': False
-                }
-            )
-            
-            # If record already existed, update it
-            if not created:
-                attendance.is_present = is_present
-                attendance.save()
-            
-            # Get updated attendance data
-            attendance_data = plugin.get_attendance_data(search_query)
+            # Record the change and get the changed row with the adjusted counters
+            row, counters, previous_version = plugin.set_attendance(enrollment, is_present)
             
-            # Return JSON response with updated data
+            # Return only what changed; a client that missed other changes has to resync
             return JsonResponse({
                 'success': True,
                 'message': f'Attendance updated successfully',
+                'row': row,
+                'counters': counters,
+                'stale': request.POST.get('version') != previous_version
+            })
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+class AttendanceTrackerSyncView(View):
+    """
+    AJAX view to fetch the attendance roster, for clients whose copy is stale.
+    The roster is returned one page at a time, DEFAULT_PAGE_SIZE rows unless page_size is given.
+    """
+    
+    @method_decorator(login_required)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+    
+    def get(self, request, plugin_id):
+        """
+        Return the attendance roster for a specific plugin instance, or 304 if the client's copy is current
+        """
+        try:
+            # Get the plugin instance
+            plugin = get_object_or_404(AttendanceTrackerPlugin, id=plugin_id)
+            
+            # Get search and paging parameters from query parameters
+            search_query = request.GET.get('search_query', '')
+            page_size = request.GET.get('page_size')
+            after = request.GET.get('after', '')
+            
+            # Validate page_size
+            if page_size is not None and not page_size.isdigit():
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Invalid page size'
+                }, status=400)
+            
+            # Answer from the roster version alone when the client is up to date
+            etag = _make_etag([plugin.get_roster_version(), search_query, page_size, after])
+            if _etag_matches(request, etag):
+                return _not_modified_response(etag)
+            
+            # The roster is always paged, so a large tracker is never sent whole
+            if page_size is None:
+                page_size = str(plugin.DEFAULT_PAGE_SIZE)
+            
+            try:
+                attendance_data = plugin.get_attendance_page(search_query, after, page_size)
+            except ValueError:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }, status=400)
+            
+            # Pages carry the counters of the whole roster, which are cached separately
+            attendance_data.update(plugin.get_attendance_counters())
+            
+            # Return JSON response
+            return _with_etag(JsonResponse({
+                'success': True,
                 'attendance_data': attendance_data
+            }), _make_etag([attendance_data['version'], search_query, page_size, after]))
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+class AttendanceTrackerBulkUpdateView(View):
+    """
+    AJAX view to update the attendance of many students at once
+    """
+    
+    # Upper bound on the number of entries per request
+    MAX_ENTRIES = 1000
+    
+    @method_decorator(login_required)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+    
+    def post(self, request, plugin_id):
+        """
+        Update attendance from a JSON body of the form
+        {"entries": [{"enrollment_id": 1, "status": "present", "is_excused": false}, ...]}
+        """
+        try:
+            # Get the plugin instance
+            plugin = get_object_or_404(AttendanceTrackerPlugin, id=plugin_id)
+            
+            # Parse the request body
+            try:
+                payload = json.loads(request.body)
+            except ValueError:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Invalid JSON body'
+                }, status=400)
+            
+            entries = payload.get('entries') if isinstance(payload, dict) else None
+            
+            # Validate entries
+            if not isinstance(entries, list) or not entries:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'A non-empty list of entries is required'
+                }, status=400)
+            
+            if len(entries) > self.MAX_ENTRIES:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'At most {self.MAX_ENTRIES} entries are allowed per request'
+                }, status=400)
+            
+            # Apply all valid entries in one transaction
+            rows, errors = plugin.mark_attendance(entries)
+            
+            # Return only the updated rows and the roster counters, not the whole roster
+            return JsonResponse({
+                'success': True,
+                'message': f'Attendance updated for {len(rows)} students',
+                'updated_count': len(rows),
+                'errors': errors,
+                'rows': rows,
+                'counters': plugin.get_attendance_counters()
+            })
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+class AttendanceCheckInView(View):
+    """
+    Endpoint for card readers and kiosks to post attendance check-ins
+    """
+    
+    # Upper bound on the number of scans per request
+    MAX_SCANS = 1000
+    
+    @method_decorator(login_required)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+    
+    def get(self, request):
+        """
+        Return the number of scans accepted and rejected today
+        """
+        return JsonResponse({
+            'success': True,
+            'counts': get_check_in_counts()
+        })
+    
+    def post(self, request):
+        """
+        Record check-ins from a JSON body of the form
+        {"scans": [{"student_id": "S2024001", "course": "CS101", "date": "2024-09-02"}, ...]}
+        Only scanner accounts, which hold the add_attendance permission, may check students in.
+        """
+        try:
+            if not request.user.has_perm('cms_plugins.add_attendance'):
+                return JsonResponse({
+                    'success': False,
+                    'error': 'You are not allowed to record check-ins'
+                }, status=403)
+            
+            # Parse the request body
+            try:
+                payload = json.loads(request.body)
+            except ValueError:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Invalid JSON body'
+                }, status=400)
+            
+            scans = payload.get('scans') if isinstance(payload, dict) else None
+            
+            # Validate scans
+            if not isinstance(scans, list) or not scans:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'A non-empty list of scans is required'
+                }, status=400)
+            
+            if len(scans) > self.MAX_SCANS:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'At most {self.MAX_SCANS} scans are allowed per request'
+                }, status=400)
+            
+            # Resolve the scans in memory and write them with other requests' scans
+            result = check_in(scans)
+            
+            return JsonResponse({
+                'success': True,
+                **result
             })
         except Exception as e:
             return JsonResponse({
@@ -389,7 +695,7 @@ class StudyRecommendationsAjaxView(View):
         """
         try:
             # Import here to avoid circular imports
-            from .models import StudyRecommendationPlugin, Student
+            from .models import StudyRecommendationPlugin
             
             # Get the plugin instance
             plugin = get_object_or_404(StudyRecommendationPlugin, id=plugin_id)
@@ -398,15 +704,8 @@ class StudyRecommendationsAjaxView(View):
             difficulty_filter = request.GET.get('difficulty', '')
             subject_filter = request.GET.get('subject', '')
             
-            # In a real implementation, you would get the student from the authenticated user
-            # For now, we'll demonstrate with a sample student or None
-            student = None
-            student_id = request.GET.get('student_id')
-            if student_id:
-                try:
-                    student = Student.objects.get(id=student_id)
-                except Student.DoesNotExist:  # type: ignore
-                    pass
+            # Recommendations are personalised for the signed-in student, if any
+            student = request.student
             
             # Get recommendations with filtering
             recommendations_data = plugin.get_recommendations(
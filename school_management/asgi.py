@@ -11,6 +11,7 @@ import os
 from typing import List
 from django.core.asgi import get_asgi_application
 from django.urls import URLPattern, URLResolver
+from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 from cms_plugins.routing import websocket_urlpatterns
 
@@ -21,5 +22,6 @@ websocket_routes: List[URLPattern | URLResolver] = list(websocket_urlpatterns)
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
-    "websocket": URLRouter(websocket_routes),  # type: ignore
+    # Sessions and users are needed by consumers that only serve signed-in users
+    "websocket": AuthMiddlewareStack(URLRouter(websocket_routes)),  # type: ignore
 })
\ No newline at end of file
@@ -84,6 +84,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "cms_plugins.middleware.StudentMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "cms.middleware.user.CurrentUserMiddleware",
@@ -133,6 +134,17 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Cache shared by every worker process, so that cache invalidation reaches all
+# of them. Without REDIS_URL each process keeps a local-memory cache of its own
+# and cms_plugins keeps nothing cached for longer than ten minutes.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+
 WSGI_APPLICATION = "school_management.wsgi.application"
 
 